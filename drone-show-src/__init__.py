@@ -13,6 +13,7 @@ bl_info = {
 }
 
 from . import operators, ui
+from .helpers import cache
 from .properties import (
     ArucoObjectProperties,
     DroneLedProperties,
@@ -32,6 +33,8 @@ classes = (
     operators.SelectDrones,
     operators.SetLedColor,
     operators.SetLedRainbow,
+    operators.SetLedEffect,
+    operators.UseObjectColorLeds,
     operators.AddAruco,
     operators.ExportAruco,
     operators.GenerateArucoMap,
@@ -96,6 +99,8 @@ def register():
 
     bpy.types.VIEW3D_MT_add.append(add_menu)
 
+    cache.register()
+
 
 def unregister():
     from bpy.utils import unregister_class
@@ -117,6 +122,8 @@ def unregister():
 
     bpy.types.VIEW3D_MT_add.remove(add_menu)
 
+    cache.unregister()
+
 
 if __name__ == "__main__":
     register()
@@ -1,5 +1,7 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+import numpy as np
 
 from bpy.types import Material, Object, Scene
 from mathutils import Vector
@@ -8,61 +10,337 @@ from ..helpers import led as led_helpers
 
 
 @dataclass()
-class Frame:
-    number: int
-    position: Vector
-    yaw: float
-    led_color: Optional[tuple[int, int, int]] = None
+class ShowTrajectory:
+    """Sampled animation of the whole swarm stored as contiguous arrays
 
-    @property
-    def position_round(self) -> tuple[float, ...]:
-        return tuple(round(coord, 3) for coord in self.position)
+    Arrays are indexed by frame first and by drone second, drone order is given by `drones`.
+    Positions are kept in float32, same as `mathutils` vectors they are sampled from.
+    """
+
+    drones: list[str]
+    frames: np.ndarray  # (F,) int32
+    positions: np.ndarray  # (F, N, 3) float32
+    yaw: np.ndarray  # (F, N) float64
+    led: np.ndarray  # (F, N, 3) uint8
+    drone_index: dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.drone_index = {name: index for index, name in enumerate(self.drones)}
+
+    @classmethod
+    def empty(cls, drones: list[str], frames: range) -> "ShowTrajectory":
+        frame_count, drone_count = len(frames), len(drones)
+        return cls(
+            drones=list(drones),
+            frames=np.arange(frames.start, frames.stop, frames.step, dtype=np.int32),
+            positions=np.zeros((frame_count, drone_count, 3), dtype=np.float32),
+            yaw=np.zeros((frame_count, drone_count), dtype=np.float64),
+            led=np.zeros((frame_count, drone_count, 3), dtype=np.uint8),
+        )
 
     @property
-    def yaw_round(self) -> float:
-        return round(self.yaw, 3)
+    def frame_count(self) -> int:
+        return len(self.frames)
 
     @property
-    def led_color_export(self) -> tuple[int, int, int]:
-        if self.led_color is None:
-            return 0, 0, 0
-        return self.led_color
+    def drone_count(self) -> int:
+        return len(self.drones)
+
+    def to_local(self) -> "ShowTrajectory":
+        """Copy of the trajectory with coordinates relative to the first frame of each drone"""
+        return ShowTrajectory(
+            drones=self.drones,
+            frames=self.frames,
+            positions=self.positions - self.positions[:1],
+            yaw=self.yaw - self.yaw[:1],
+            led=self.led,
+        )
 
-    def shift(self, other: "Frame") -> None:
-        self.position -= other.position
-        self.yaw -= other.yaw
+    def export_rows(self, drone_index: int) -> Iterator[tuple]:
+        """Rows of the drone animation in export format: frame, x, y, z, yaw, red, green, blue"""
+        positions = self.positions[:, drone_index].tolist()
+        yaws = self.yaw[:, drone_index].tolist()
+        leds = self.led[:, drone_index].tolist()
+        for number, position, yaw, led_color in zip(
+            self.frames.tolist(), positions, yaws, leds
+        ):
+            yield (
+                number,
+                *(round(coord, 3) for coord in position),
+                round(yaw, 3),
+                *led_color,
+            )
 
 
-def extract_animation(
+def extract_trajectory(
     scene: Scene,
-    drone_obj: Object,
-    led_material: Optional[Material],
+    drones: dict[Object, Optional[Material]],
     local_coordinates=False,
-):
+) -> ShowTrajectory:
+    """Extract animation of all drones, stepping through the timeline only once"""
+    extractor = TrajectoryExtractor(scene, drones)
+    while not extractor.done:
+        extractor.step()
+
     if local_coordinates:
-        scene.frame_set(scene.frame_start)
-        origin_frame = extract_frame(scene.frame_start, drone_obj)
-    else:
-        origin_frame = None
+        return extractor.trajectory.to_local()
+    return extractor.trajectory
+
+
+class TrajectoryExtractor:
+    """Extraction of drone animation split into small units of work
+
+    Drones animated only by their own F-curves are sampled directly from them one drone per step,
+    then the timeline is stepped one frame per step if some drones require full scene evaluation.
+    Frames default to the scene frame range.
+    """
+
+    def __init__(
+        self,
+        scene: Scene,
+        drones: dict[Object, Optional[Material]],
+        frames: Optional[range] = None,
+    ):
+        self.scene = scene
+        if frames is None:
+            frames = range(scene.frame_start, scene.frame_end + 1)
+        self.frames = frames
+        self.frame_current = scene.frame_current
+        self.trajectory = ShowTrajectory.empty(
+            [drone_obj.name for drone_obj in drones], self.frames
+        )
+
+        self.sampled_drones = list()
+        self.evaluated_drones = dict()
+        for drone_index, (drone_obj, led_material) in enumerate(drones.items()):
+            if supports_fcurve_sampling(scene, drone_obj, led_material):
+                self.sampled_drones.append((drone_index, drone_obj, led_material))
+            else:
+                self.evaluated_drones[drone_index] = (drone_obj, led_material)
+
+        self.processed = 0
+        self.total = len(self.sampled_drones)
+        if self.evaluated_drones:
+            self.total += len(self.frames)
 
-    for frame_number in range(scene.frame_start, scene.frame_end + 1):
-        scene.frame_set(frame_number)
-        frame = extract_frame(frame_number, drone_obj, led_material, shift_frame=origin_frame)
-        yield frame
+    @property
+    def done(self) -> bool:
+        return self.processed >= self.total
+
+    def step(self) -> None:
+        if self.processed < len(self.sampled_drones):
+            drone_index, drone_obj, led_material = self.sampled_drones[self.processed]
+            extract_fcurve_animation(self.trajectory, drone_index, drone_obj, led_material)
+        else:
+            frame_index = self.processed - len(self.sampled_drones)
+            self._extract_evaluated_frame(frame_index)
+
+        self.processed += 1
+        if self.done and self.evaluated_drones:
+            self.scene.frame_set(self.frame_current)
+
+    def cancel(self) -> None:
+        if self.processed > len(self.sampled_drones) and not self.done:
+            self.scene.frame_set(self.frame_current)
+
+    def _extract_evaluated_frame(self, frame_index: int) -> None:
+        self.scene.frame_set(self.frames[frame_index])
+        for drone_index, (drone_obj, led_material) in self.evaluated_drones.items():
+            position, yaw, led_color = extract_frame(drone_obj, led_material)
+            self.trajectory.positions[frame_index, drone_index] = position
+            self.trajectory.yaw[frame_index, drone_index] = yaw
+            if led_color is not None:
+                self.trajectory.led[frame_index, drone_index] = np.clip(led_color, 0, 255)
 
 
 def extract_frame(
-    frame_number, drone_obj: Object, led_material: Optional[Material] = None, shift_frame: Optional[Frame] = None
-) -> Frame:
-    number = frame_number
+    drone_obj: Object, led_material: Optional[Material] = None
+) -> tuple[Vector, float, Optional[tuple[int, int, int]]]:
     position = drone_obj.matrix_world.to_translation()
     yaw = drone_obj.matrix_world.to_euler("XYZ")[2]
 
-    frame = Frame(number=number, position=position, yaw=yaw)
-    if shift_frame:
-        frame.shift(shift_frame)
+    led_color = None
+    if led_material is not None:
+        led_color = led_helpers.get_led_color(drone_obj, led_material)
+
+    return position, yaw, led_color
+
+
+FCURVE_TRANSFORM_PATHS = {"location", "rotation_euler"}
+EULER_ORDERS = {"XYZ", "XZY", "YXZ", "YZX", "ZXY", "ZYX"}
+# Blender treats matrices as gimbal locked below this length of the rotated X axis on the XY plane
+GIMBAL_LOCK_THRESHOLD = np.float32(3.75e-5)
+
+
+def supports_fcurve_sampling(
+    scene: Scene, drone_obj: Object, led_material: Optional[Material] = None
+) -> bool:
+    """Check if drone animation can be sampled from F-curves without evaluating the scene
+
+    This is true for drones that are animated only by location and euler rotation F-curves
+    of their own action, without parents, constraints, drivers or NLA.
+    Drones with LED color in the object color may also have object color F-curves.
+    """
+    if scene.render.frame_map_old != scene.render.frame_map_new:
+        return False
+
+    if (
+        drone_obj.parent is not None
+        or drone_obj.constraints
+        or drone_obj.rigid_body is not None
+        or drone_obj.rotation_mode not in EULER_ORDERS
+    ):
+        return False
+
+    if (
+        any(drone_obj.delta_location)
+        or any(drone_obj.delta_rotation_euler)
+        or any(scale != 1 for scale in drone_obj.delta_scale)
+        or any(scale <= 0 for scale in drone_obj.scale)
+    ):
+        return False
+
+    data_paths = FCURVE_TRANSFORM_PATHS
+    if led_material is not None and led_material.led.use_object_color:
+        data_paths = data_paths | {"color"}
+    if not _is_animated_by_action(drone_obj, data_paths):
+        return False
+
+    if led_material is not None:
+        try:
+            id_data, _, _ = led_helpers.get_led_color_property(drone_obj, led_material)
+        except led_helpers.LedError:
+            return False
+        if id_data != drone_obj and not _is_animated_by_action(id_data):
+            return False
+
+    return True
+
+
+def extract_fcurve_animation(
+    trajectory: ShowTrajectory,
+    drone_index: int,
+    drone_obj: Object,
+    led_material: Optional[Material] = None,
+) -> None:
+    """Sample drone animation from F-curves, drone must pass `supports_fcurve_sampling`"""
+    frames = trajectory.frames.tolist()
+
+    locations = _sample_fcurves(drone_obj, "location", drone_obj.location, frames)
+    rotations = _sample_fcurves(
+        drone_obj, "rotation_euler", drone_obj.rotation_euler, frames
+    )
+    trajectory.positions[:, drone_index] = locations
+    trajectory.yaw[:, drone_index] = _euler_to_yaw(rotations, drone_obj.rotation_mode)
 
     if led_material is not None:
-        frame.led_color = led_helpers.get_material_color(led_material)
+        id_data, data_path, value = led_helpers.get_led_color_property(drone_obj, led_material)
+        colors = _sample_fcurves(id_data, data_path, value, frames)
+        trajectory.led[:, drone_index] = led_helpers.colors_to_rgb(colors)
+
+
+def _is_animated_by_action(id_data, data_paths: Optional[set[str]] = None) -> bool:
+    animation_data = id_data.animation_data
+    if animation_data is None:
+        return True
+
+    if (
+        animation_data.drivers
+        or animation_data.nla_tracks
+        or animation_data.use_tweak_mode
+        or animation_data.action_blend_type != "REPLACE"
+        or animation_data.action_influence != 1
+    ):
+        return False
+
+    if animation_data.action is None:
+        return True
+
+    for fcurve in animation_data.action.fcurves:
+        if fcurve.mute:
+            return False
+        if data_paths is not None and fcurve.data_path not in data_paths:
+            return False
+    return True
+
+
+def _sample_fcurves(id_data, data_path: str, value, frames: list[int]) -> np.ndarray:
+    """Sample array property from F-curves, channels without F-curves keep their current value"""
+    samples = np.empty((len(frames), len(value)), dtype=np.float32)
+    samples[:] = tuple(value)
+
+    animation_data = id_data.animation_data
+    if animation_data is None or animation_data.action is None:
+        return samples
+
+    for fcurve in animation_data.action.fcurves:
+        if fcurve.data_path != data_path or fcurve.array_index >= len(value):
+            continue
+        samples[:, fcurve.array_index] = [fcurve.evaluate(frame) for frame in frames]
+    return samples
+
+
+def _euler_to_yaw(rotations: np.ndarray, order: str) -> np.ndarray:
+    """Vectorized equivalent of `Euler(rotation, order).to_matrix().to_euler("XYZ")[2]`"""
+    rotations = rotations.astype(np.float64)
+    cos, sin = np.cos(rotations), np.sin(rotations)
+    ones, zeros = np.ones(len(rotations)), np.zeros(len(rotations))
+
+    axis_matrices = []
+    for axis in range(3):
+        c, s = cos[:, axis], sin[:, axis]
+        if axis == 0:
+            rows = ((ones, zeros, zeros), (zeros, c, -s), (zeros, s, c))
+        elif axis == 1:
+            rows = ((c, zeros, s), (zeros, ones, zeros), (-s, zeros, c))
+        else:
+            rows = ((c, -s, zeros), (s, c, zeros), (zeros, zeros, ones))
+        axis_matrices.append(np.moveaxis(np.array(rows), -1, 0))
+
+    # Euler order lists axes in the order they are applied
+    first, second, third = ("XYZ".index(axis) for axis in order)
+    matrix = axis_matrices[third] @ axis_matrices[second] @ axis_matrices[first]
+
+    # Blender builds the matrix in double precision, stores it in single precision,
+    # normalizes its columns and decomposes it in single precision
+    matrix = matrix.astype(np.float32)
+    lengths = np.sqrt(
+        matrix[:, 0] * matrix[:, 0] + matrix[:, 1] * matrix[:, 1] + matrix[:, 2] * matrix[:, 2]
+    )
+    matrix = matrix * (np.float32(1) / lengths)[:, None, :]
+
+    # Same solution choice as Blender's `mat3_normalized_to_eul`
+    cy = np.hypot(matrix[:, 0, 0], matrix[:, 1, 0], dtype=np.float64).astype(np.float32)
+    euler1 = np.stack(
+        (
+            _atan2(matrix[:, 2, 1], matrix[:, 2, 2]),
+            _atan2(-matrix[:, 2, 0], cy),
+            _atan2(matrix[:, 1, 0], matrix[:, 0, 0]),
+        ),
+        axis=1,
+    )
+    euler2 = np.stack(
+        (
+            _atan2(-matrix[:, 2, 1], -matrix[:, 2, 2]),
+            _atan2(-matrix[:, 2, 0], -cy),
+            _atan2(-matrix[:, 1, 0], -matrix[:, 0, 0]),
+        ),
+        axis=1,
+    )
+    gimbal_lock = cy <= GIMBAL_LOCK_THRESHOLD
+    euler1[gimbal_lock, 0] = _atan2(-matrix[gimbal_lock, 1, 2], matrix[gimbal_lock, 1, 1])
+    euler1[gimbal_lock, 2] = 0
+    euler2[gimbal_lock] = euler1[gimbal_lock]
+
+    use_second = _abs_sum(euler1) > _abs_sum(euler2)
+    return np.where(use_second, euler2[:, 2], euler1[:, 2]).astype(np.float64)
+
+
+def _atan2(y: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """Single precision `atan2f`, NumPy's own single precision version differs in the last bit more often"""
+    return np.arctan2(y, x, dtype=np.float64).astype(np.float32)
+
 
-    return frame
+def _abs_sum(eulers: np.ndarray) -> np.ndarray:
+    eulers = np.abs(eulers)
+    return eulers[:, 0] + eulers[:, 1] + eulers[:, 2]
@@ -1,14 +1,16 @@
-import json
+import functools
+import itertools
+from collections import OrderedDict
 from pathlib import Path
+from typing import Iterator, Optional, Sequence
 
 import numpy as np
 
 import bpy
-from mathutils import Vector
-
-with (Path(__file__).parent / Path("aruco_dict.json")).open("r") as f:
-    aruco_dict = json.load(f)
+from mathutils import Euler, Matrix, Vector
 
+# Markers of every dictionary as rows of packed bits, see get_dictionary
+ARUCO_DICTS_DIR = Path(__file__).parent / "aruco_dicts"
 
 aruco_sizes = {
     "aruco": 5,
@@ -19,40 +21,119 @@ aruco_sizes = {
 }
 
 
+# Memory limit of rasterized markers kept for reuse (bytes)
+MARKER_CACHE_BYTES = 64 * 1024 * 1024
+# Size of one marker in the atlas of all dictionary markers
+ATLAS_TILE_SIZE = 64
+# Columns of Aruco map files: id, length, x, y, z, rot_z, rot_y, rot_x
+MAP_COLUMNS = 8
+# RGBA colors of black and white marker cells
+MARKER_COLORS = np.array(((0, 0, 0, 1), (1, 1, 1, 1)), dtype=np.float32)
+
+
 def generate_marker(dict_name: str, marker_id: int, image_size: int = 512) -> np.ndarray:
-    aruco_bytes = aruco_dict[dict_name][marker_id]
+    """Generate (image_size, image_size, 4) RGBA image of the marker with a black rim"""
+    return np.take(MARKER_COLORS, rasterize_marker(dict_name, marker_id, image_size), axis=0)
+
+
+def rasterize_marker(dict_name: str, marker_id: int, image_size: int) -> np.ndarray:
+    """Rasterize the marker to a read-only (image_size, image_size) array of 0 and 1
+
+    Rasters are cached up to `MARKER_CACHE_BYTES`, least recently used ones are evicted first.
+    """
+    key = (dict_name, marker_id, image_size)
+    raster = _marker_cache.get(key)
+    if raster is None:
+        raster = _rasterize_grids(marker_bits(dict_name, marker_id), image_size)
+        raster.setflags(write=False)
+        _marker_cache.add(key, raster)
+    return raster
+
+
+class _RasterCache:
+    """Rasters ordered from least to most recently used, limited by their total size"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.rasters: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self.size = 0
+
+    def get(self, key: tuple) -> Optional[np.ndarray]:
+        raster = self.rasters.get(key)
+        if raster is not None:
+            self.rasters.move_to_end(key)
+        return raster
+
+    def add(self, key: tuple, raster: np.ndarray) -> None:
+        if raster.nbytes > self.max_bytes:
+            return
+        self.rasters[key] = raster
+        self.size += raster.nbytes
+        while self.size > self.max_bytes:
+            _, evicted = self.rasters.popitem(last=False)
+            self.size -= evicted.nbytes
+
+
+_marker_cache = _RasterCache(MARKER_CACHE_BYTES)
+
+
+def generate_atlas(dict_name: str, tile_size: int = ATLAS_TILE_SIZE) -> np.ndarray:
+    """Generate RGBA image of all markers of the dictionary in a square grid of tiles
+
+    Marker ID `i` is in the column `i % columns` and the row `i // columns`
+    counting from the first row of the image, see get_atlas_columns.
+    """
+    dictionary = get_dictionary(dict_name)
     aruco_size = aruco_sizes[dict_name]
-    bits = []
-    bits_count = aruco_size * aruco_size
+    columns = get_atlas_columns(dict_name)
+
+    grids = np.zeros((columns * columns, aruco_size, aruco_size), dtype=np.uint8)
+    bits = np.unpackbits(dictionary, axis=1, count=aruco_size * aruco_size)
+    grids[: len(dictionary)] = bits.reshape(-1, aruco_size, aruco_size)
+
+    tiles = _rasterize_grids(grids, tile_size).reshape(columns, columns, tile_size, tile_size)
+    raster = tiles.transpose(0, 2, 1, 3).reshape(columns * tile_size, columns * tile_size)
+    return np.take(MARKER_COLORS, raster, axis=0)
+
 
-    # translated from https://github.com/okalachev/arucogen/blob/master/main.js#L53
-    for aruco_byte in aruco_bytes:
-        start = bits_count - len(bits)
-        for i in range(min(7, start - 1), -1, -1):
-            bits.append((aruco_byte >> i) & 1)
+def get_atlas_columns(dict_name: str) -> int:
+    return int(np.ceil(np.sqrt(len(get_dictionary(dict_name)))))
 
-    out = np.zeros(shape=(image_size, image_size, 4), dtype=np.float32)
-    out[:, :, 3] = 1.0
 
+def _rasterize_grids(bits: np.ndarray, image_size: int) -> np.ndarray:
+    """Rasterize marker bits (..., size, size) with a black rim to (..., image_size, image_size)"""
     black_rim_offset = 1
-    pixel_size = image_size / (aruco_size + 2 * black_rim_offset)
+    padding = [(0, 0)] * (bits.ndim - 2) + [(black_rim_offset, black_rim_offset)] * 2
+    grids = np.pad(bits, padding)
+
+    # Cell boundaries are rounded, so cells may differ in size by a pixel
+    pixel_size = image_size / grids.shape[-1]
+    boundaries = np.round(np.arange(grids.shape[-1] + 1) * pixel_size).astype(np.int64)
+    boundaries[-1] = image_size
+    cell_sizes = np.diff(boundaries)
+
+    return np.repeat(np.repeat(grids, cell_sizes, axis=-2), cell_sizes, axis=-1)
+
 
-    for i in range(aruco_size):
-        for j in range(aruco_size):
-            if not bits[i * aruco_size + j]:
-                continue
+def marker_bits(dict_name: str, marker_id: int) -> np.ndarray:
+    """Bits of the marker as (size, size) array of 0 and 1, 1 is white"""
+    aruco_size = aruco_sizes[dict_name]
+    packed = get_dictionary(dict_name)[marker_id]
+    return np.unpackbits(packed, count=aruco_size * aruco_size).reshape(aruco_size, aruco_size)
 
-            x_start = round((j + 0 + black_rim_offset) * pixel_size)
-            y_start = round((i + 0 + black_rim_offset) * pixel_size)
-            x_end = round((j + 1 + black_rim_offset) * pixel_size)
-            y_end = round((i + 1 + black_rim_offset) * pixel_size)
 
-            out[y_start:y_end, x_start:x_end, :] = 1.0
+@functools.cache
+def get_dictionary(dict_name: str) -> np.ndarray:
+    """Memory-mapped (markers count, bytes) array of marker bits packed row by row
 
-    return out
+    Dictionaries are loaded on first use, so enabling the add-on doesn't read them.
+    """
+    if dict_name not in aruco_sizes:
+        raise KeyError(f"Unknown Aruco dictionary '{dict_name}'")
+    return np.load(ARUCO_DICTS_DIR / f"{dict_name}.npy", mmap_mode="r")
 
 
-def get_marker_mesh() -> bpy.types.Mesh:
+def get_marker_mesh(add_uv: bool = False) -> bpy.types.Mesh:
     name = "Aruco Marker"
 
     verts = [
@@ -67,6 +148,13 @@ def get_marker_mesh() -> bpy.types.Mesh:
     mesh = bpy.data.meshes.new(name=name)
     mesh.from_pydata(verts, edges, faces)
 
+    if add_uv:
+        uv_layer = mesh.uv_layers.new(name="Aruco")
+        uv_layer.data[0].uv = (0, 0)
+        uv_layer.data[1].uv = (1, 0)
+        uv_layer.data[2].uv = (1, 1)
+        uv_layer.data[3].uv = (0, 1)
+
     return mesh
 
 
@@ -76,12 +164,15 @@ def get_name(dict_name: str, marker_id: int) -> str:
 
 def get_aruco_image(dict_name: str, marker_id: int, image_size=256):
     name = get_name(dict_name, marker_id)
-    if image := bpy.data.images.get(name):
+    image = bpy.data.images.get(name)
+    if image is not None and tuple(image.size) == (image_size, image_size):
         return image
 
-    np_image = generate_marker(dict_name, marker_id, image_size)
-    image = bpy.data.images.new(name=name, width=image_size, height=image_size)
-    image.pixels = np_image.ravel()
+    if image is None:
+        image = bpy.data.images.new(name=name, width=image_size, height=image_size)
+    else:
+        image.scale(image_size, image_size)
+    image.pixels.foreach_set(generate_marker(dict_name, marker_id, image_size).ravel())
     image.pack()
     return image
 
@@ -91,6 +182,96 @@ def get_aruco_material(dict_name: str, marker_id: int) -> bpy.types.Material:
     if material := bpy.data.materials.get(name):
         return material
 
+    material, node_tex = _new_marker_material(name)
+    node_tex.image = get_aruco_image(dict_name, marker_id)
+
+    return material
+
+
+def get_atlas_image(dict_name: str) -> bpy.types.Image:
+    name = get_atlas_name(dict_name)
+    if image := bpy.data.images.get(name):
+        return image
+
+    np_image = generate_atlas(dict_name)
+    height, width = np_image.shape[:2]
+    image = bpy.data.images.new(name=name, width=width, height=height)
+    image.pixels.foreach_set(np_image.ravel())
+    image.pack()
+    return image
+
+
+def get_atlas_material(dict_name: str) -> bpy.types.Material:
+    """Get or create the material shared by all markers of the dictionary
+
+    The marker tile is picked from the atlas by `aruco.marker_id` of each object,
+    so changing the marker ID doesn't need a new material or image.
+    """
+    name = get_atlas_name(dict_name)
+    if material := bpy.data.materials.get(name):
+        return material
+
+    material, node_tex = _new_marker_material(name)
+    node_tex.image = get_atlas_image(dict_name)
+
+    nodes = material.node_tree.nodes
+    links = material.node_tree.links
+    columns = get_atlas_columns(dict_name)
+
+    node_attribute = nodes.new("ShaderNodeAttribute")
+    node_attribute.attribute_type = "OBJECT"
+    node_attribute.attribute_name = "aruco.marker_id"
+    node_attribute.location = -1400, 0
+
+    # Tile column is `id % columns` and tile row is `id // columns`
+    node_column = nodes.new("ShaderNodeMath")
+    node_column.operation = "MODULO"
+    node_column.inputs[1].default_value = columns
+    node_column.location = -1200, 100
+
+    node_divide = nodes.new("ShaderNodeMath")
+    node_divide.operation = "DIVIDE"
+    node_divide.inputs[1].default_value = columns
+    node_divide.location = -1200, -100
+
+    node_row = nodes.new("ShaderNodeMath")
+    node_row.operation = "FLOOR"
+    node_row.location = -1000, -100
+
+    node_tile = nodes.new("ShaderNodeCombineXYZ")
+    node_tile.location = -800, 0
+
+    node_coords = nodes.new("ShaderNodeTexCoord")
+    node_coords.location = -800, 300
+
+    node_offset = nodes.new("ShaderNodeVectorMath")
+    node_offset.operation = "ADD"
+    node_offset.location = -600, 100
+
+    node_scale = nodes.new("ShaderNodeVectorMath")
+    node_scale.operation = "DIVIDE"
+    node_scale.inputs[1].default_value = (columns, columns, 1)
+    node_scale.location = -600, -100
+
+    links.new(node_attribute.outputs["Fac"], node_column.inputs[0])
+    links.new(node_attribute.outputs["Fac"], node_divide.inputs[0])
+    links.new(node_divide.outputs["Value"], node_row.inputs[0])
+    links.new(node_column.outputs["Value"], node_tile.inputs["X"])
+    links.new(node_row.outputs["Value"], node_tile.inputs["Y"])
+    links.new(node_coords.outputs["UV"], node_offset.inputs[0])
+    links.new(node_tile.outputs["Vector"], node_offset.inputs[1])
+    links.new(node_offset.outputs["Vector"], node_scale.inputs[0])
+    links.new(node_scale.outputs["Vector"], node_tex.inputs["Vector"])
+
+    return material
+
+
+def get_atlas_name(dict_name: str) -> str:
+    return f"Aruco {dict_name} atlas"
+
+
+def _new_marker_material(name: str) -> tuple[bpy.types.Material, bpy.types.ShaderNode]:
+    """Create material with image texture node for the marker image"""
     material = bpy.data.materials.new(name=name)
 
     material.use_nodes = True
@@ -108,7 +289,6 @@ def get_aruco_material(dict_name: str, marker_id: int) -> bpy.types.Material:
     node_principled.location = 0, 0
 
     node_tex = nodes.new("ShaderNodeTexImage")
-    node_tex.image = get_aruco_image(dict_name, marker_id)
     node_tex.interpolation = "Closest"
     node_tex.location = -400, 0
 
@@ -118,16 +298,23 @@ def get_aruco_material(dict_name: str, marker_id: int) -> bpy.types.Material:
     links.new(node_tex.outputs["Color"], node_principled.inputs["Base Color"])
     links.new(node_principled.outputs["BSDF"], node_output.inputs["Surface"])
 
-    return material
+    return material, node_tex
 
 
 def update_aruco_material(obj: bpy.types.Object):
-    material = get_aruco_material(obj.aruco.dictionary.lower(), obj.aruco.marker_id)
-
-    if obj.data.materials:
-        obj.data.materials[0] = material
+    if obj.aruco.use_atlas:
+        material = get_atlas_material(obj.aruco.dictionary.lower())
     else:
-        obj.data.materials.append(material)
+        material = get_aruco_material(obj.aruco.dictionary.lower(), obj.aruco.marker_id)
+
+    if not obj.material_slots:
+        obj.data.materials.append(None)
+
+    slot = obj.material_slots[0]
+    # Markers sharing a mesh keep their materials on objects
+    if obj.data.users > 1:
+        slot.link = "OBJECT"
+    slot.material = material
 
 
 def get_rim_material() -> bpy.types.Material:
@@ -164,3 +351,111 @@ def get_rim_material() -> bpy.types.Material:
 def get_aruco_objects(context, selected=False) -> list[bpy.types.Object]:
     objects = context.selected_objects if selected else context.scene.objects
     return [obj for obj in objects if obj.aruco.is_aruco]
+
+
+def add_aruco_objects(
+    collection: bpy.types.Collection,
+    dict_name: str,
+    marker_ids: Sequence[int],
+    locations: np.ndarray,
+    rotations: np.ndarray,
+    sizes: np.ndarray,
+    rim_size: Optional[float] = None,
+    parent: Optional[bpy.types.Object] = None,
+    use_atlas: bool = False,
+) -> list[bpy.types.Object]:
+    """Create marker objects at once, markers share one mesh and rims share another
+
+    Transforms are in world space, objects keep them when parented.
+
+    :param locations: locations (N, 3) or one location for all markers
+    :param rotations: XYZ Euler rotations (N, 3) or one rotation for all markers
+    :param sizes: sizes of markers (N,) or one size for all markers
+    :param rim_size: size of the white rim around markers, markers have no rims if None
+    :param use_atlas: markers share the atlas material of the dictionary
+    """
+    count = len(marker_ids)
+    locations = np.broadcast_to(np.asarray(locations, dtype=np.float64), (count, 3)).tolist()
+    rotations = np.broadcast_to(np.asarray(rotations, dtype=np.float64), (count, 3)).tolist()
+    sizes = np.broadcast_to(np.asarray(sizes, dtype=np.float64), (count,)).tolist()
+
+    marker_mesh = get_marker_mesh(add_uv=True)
+    if rim_size is not None:
+        rim_mesh = get_marker_mesh()
+        rim_mesh.materials.append(get_rim_material())
+
+    parent_inverse = parent.matrix_world.inverted() if parent is not None else None
+    rim_offset = Vector((0, 0, -0.001))
+
+    aruco_objects = []
+    new_objects = []
+    for marker_id, location, rotation, size in zip(marker_ids, locations, rotations, sizes):
+        rotation = Euler(rotation).to_matrix()
+        matrix = Matrix.LocRotScale(location, rotation, (size / 2, size / 2, 1))
+
+        aruco_object = bpy.data.objects.new(f"Aruco {marker_id}", marker_mesh)
+        aruco_object.show_name = True
+        aruco_object.aruco.dictionary = dict_name
+        aruco_object.aruco.marker_id = int(marker_id)
+        aruco_object.aruco.use_atlas = use_atlas
+        if parent is not None:
+            aruco_object.parent = parent
+            aruco_object.matrix_parent_inverse = parent_inverse
+        aruco_object.matrix_basis = matrix
+        aruco_objects.append(aruco_object)
+        new_objects.append(aruco_object)
+
+        if rim_size is not None:
+            rim_object = bpy.data.objects.new("Aruco marker rim", rim_mesh)
+            rim_object.parent = aruco_object
+            rim_object.matrix_parent_inverse = matrix.inverted_safe()
+            rim_object.matrix_basis = Matrix.LocRotScale(
+                Vector(location) + rotation @ rim_offset,
+                rotation,
+                (size / 2 + rim_size, size / 2 + rim_size, 1),
+            )
+            new_objects.append(rim_object)
+
+    for obj in new_objects:
+        collection.objects.link(obj)
+
+    # Materials are assigned once all markers use the mesh, so they are linked to objects
+    for aruco_object in aruco_objects:
+        aruco_object.aruco.is_aruco = True
+        update_aruco_material(aruco_object)
+
+    return aruco_objects
+
+
+def read_aruco_map(
+    filepath: Path,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Read Aruco map file with a marker per line, missing coordinates and rotations are 0
+
+    :return: marker IDs (N,), sizes (N,), locations (N, 3) and XYZ Euler rotations (N, 3)
+    :raises ValueError: if a line can't be parsed
+    """
+    with filepath.open("r") as f:
+        lines = _map_lines(f)
+        first_line = next(lines, None)
+        if first_line is None:
+            data = np.empty((0, MAP_COLUMNS))
+        else:
+            data = np.loadtxt(itertools.chain((first_line,), lines), ndmin=2)
+
+    marker_ids = data[:, 0].astype(np.int64)
+    if not np.array_equal(marker_ids, data[:, 0]) or np.any(marker_ids < 0):
+        raise ValueError("marker IDs must be non-negative integers")
+    return marker_ids, data[:, 1], data[:, 2:5], data[:, 7:4:-1]
+
+
+def _map_lines(lines: Iterator[str]) -> Iterator[str]:
+    """Lines of Aruco map file without comments, padded to all columns"""
+    for line_number, line in enumerate(lines, start=1):
+        items = line.split("#", 1)[0].split()
+        if not items:
+            continue
+        if len(items) < 2:
+            raise ValueError(f"line {line_number}: expected marker ID and length")
+        items = items[:MAP_COLUMNS] + ["0"] * (MAP_COLUMNS - len(items))
+        yield " ".join(items)
@@ -0,0 +1,309 @@
+import hashlib
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+import bpy
+from bpy.app.handlers import persistent
+from bpy.types import ID, Material, Object, Scene
+
+from ..helpers import animation as animation_helpers
+from ..helpers import led as led_helpers
+
+TRANSFORM_PROPERTIES = (
+    "location",
+    "rotation_euler",
+    "rotation_quaternion",
+    "rotation_axis_angle",
+    "scale",
+    "delta_location",
+    "delta_rotation_euler",
+    "delta_rotation_quaternion",
+    "delta_scale",
+)
+
+
+@dataclass()
+class DroneCache:
+    fingerprint: str
+    led_material: Optional[str]
+    positions: np.ndarray
+    yaw: np.ndarray
+    led: np.ndarray
+
+
+@dataclass()
+class SceneCache:
+    key: tuple
+    drones: dict[str, DroneCache] = field(default_factory=dict)
+
+
+_scene_caches: dict[int, SceneCache] = dict()
+
+
+def get_trajectory(
+    scene: Scene,
+    drones: dict[Object, Optional[Material]],
+    local_coordinates=False,
+) -> animation_helpers.ShowTrajectory:
+    """Extract animation of drones, reusing stored animation of drones that did not change"""
+    extraction = CachedExtraction(scene, drones)
+    while not extraction.done:
+        extraction.step()
+    return extraction.result(local_coordinates)
+
+
+class CachedExtraction:
+    """Extraction of drones missing from the cache, split into small units of work
+
+    Missing drones are extracted with `make_extractor(scene, drones)`, which returns an object
+    with the interface of `TrajectoryExtractor`.
+    """
+
+    def __init__(
+        self,
+        scene: Scene,
+        drones: dict[Object, Optional[Material]],
+        make_extractor=animation_helpers.TrajectoryExtractor,
+    ):
+        self.scene = scene
+        self.drones = drones
+        self.key = (
+            scene.frame_start,
+            scene.frame_end,
+            scene.render.frame_map_old,
+            scene.render.frame_map_new,
+        )
+
+        cache = _get_scene_cache(scene, self.key)
+        self.fingerprints = {
+            drone_obj: drone_fingerprint(drone_obj, led_material)
+            for drone_obj, led_material in drones.items()
+        }
+        # Keep references to reused drones, cache may be invalidated while the extraction runs
+        self.reused_drones = {
+            drone_obj.name: cache.drones[drone_obj.name]
+            for drone_obj in drones
+            if drone_obj.name in cache.drones
+            and cache.drones[drone_obj.name].fingerprint == self.fingerprints[drone_obj]
+        }
+        self.changed_drones = {
+            drone_obj: led_material
+            for drone_obj, led_material in drones.items()
+            if drone_obj.name not in self.reused_drones
+        }
+        self.extractor = make_extractor(scene, self.changed_drones)
+
+    @property
+    def done(self) -> bool:
+        return self.extractor.done
+
+    @property
+    def processed(self) -> int:
+        return self.extractor.processed
+
+    @property
+    def total(self) -> int:
+        return self.extractor.total
+
+    def step(self) -> None:
+        self.extractor.step()
+
+    def cancel(self) -> None:
+        self.extractor.cancel()
+
+    def result(self, local_coordinates=False) -> animation_helpers.ShowTrajectory:
+        """Store extracted drones in the cache and assemble trajectory of all drones"""
+        cache = _get_scene_cache(self.scene, self.key)
+        extracted_caches = dict()
+        extracted = self.extractor.trajectory
+        for drone_index, (drone_obj, led_material) in enumerate(
+            self.changed_drones.items()
+        ):
+            extracted_caches[drone_obj.name] = DroneCache(
+                fingerprint=self.fingerprints[drone_obj],
+                led_material=led_material.name if led_material is not None else None,
+                positions=extracted.positions[:, drone_index].copy(),
+                yaw=extracted.yaw[:, drone_index].copy(),
+                led=extracted.led[:, drone_index].copy(),
+            )
+
+        names = [drone_obj.name for drone_obj in self.drones]
+        for name in cache.drones.keys() - set(names):
+            del cache.drones[name]
+        cache.drones.update(extracted_caches)
+        drone_caches = {**self.reused_drones, **extracted_caches}
+
+        trajectory = animation_helpers.ShowTrajectory.empty(
+            names, self.extractor.frames
+        )
+        for drone_index, name in enumerate(names):
+            drone_cache = drone_caches[name]
+            trajectory.positions[:, drone_index] = drone_cache.positions
+            trajectory.yaw[:, drone_index] = drone_cache.yaw
+            trajectory.led[:, drone_index] = drone_cache.led
+
+        if local_coordinates:
+            return trajectory.to_local()
+        return trajectory
+
+
+def _get_scene_cache(scene: Scene, key: tuple) -> SceneCache:
+    cache = _scene_caches.get(scene.session_uid)
+    if cache is None or cache.key != key:
+        cache = SceneCache(key=key)
+        _scene_caches[scene.session_uid] = cache
+    return cache
+
+
+def invalidate_object(name: str) -> None:
+    for cache in _scene_caches.values():
+        cache.drones.pop(name, None)
+
+
+def invalidate_material(name: str) -> None:
+    for cache in _scene_caches.values():
+        for drone_name, drone_cache in list(cache.drones.items()):
+            if drone_cache.led_material == name:
+                del cache.drones[drone_name]
+
+
+def clear(scene: Optional[Scene] = None) -> None:
+    if scene is None:
+        _scene_caches.clear()
+    else:
+        _scene_caches.pop(scene.session_uid, None)
+
+
+def drone_fingerprint(drone_obj: Object, led_material: Optional[Material]) -> str:
+    """Hash of the data defining drone animation: transforms, F-curves and LED material
+
+    Dependencies on other objects (parents, constraints, drivers) are not included,
+    these are handled by the depsgraph update handler.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    _update(
+        digest,
+        drone_obj.name,
+        drone_obj.rotation_mode,
+        drone_obj.parent.name if drone_obj.parent is not None else None,
+        tuple(
+            (constraint.type, constraint.name, constraint.mute, constraint.influence)
+            for constraint in drone_obj.constraints
+        ),
+    )
+
+    animated = _hash_animation(digest, drone_obj)
+    for prop in TRANSFORM_PROPERTIES:
+        for index, value in enumerate(getattr(drone_obj, prop)):
+            if (prop, index) not in animated:
+                _update(digest, prop, index, value)
+
+    if led_material is not None:
+        id_data, data_path, value = led_helpers.get_led_color_property(
+            drone_obj, led_material
+        )
+        _update(digest, led_material.name, data_path)
+        animated = _hash_animation(digest, id_data)
+        for index, component in enumerate(value):
+            if (data_path, index) not in animated:
+                _update(digest, index, component)
+
+    return digest.hexdigest()
+
+
+def _hash_animation(digest, id_data: ID) -> set[tuple[str, int]]:
+    """Add animation data to the digest and return animated properties"""
+    animated = set()
+    animation_data = id_data.animation_data
+    if animation_data is None:
+        return animated
+
+    _update(
+        digest,
+        animation_data.action_blend_type,
+        animation_data.action_influence,
+        len(animation_data.drivers),
+        len(animation_data.nla_tracks),
+    )
+
+    action = animation_data.action
+    if action is None:
+        return animated
+
+    _update(digest, action.name)
+    for fcurve in action.fcurves:
+        animated.add((fcurve.data_path, fcurve.array_index))
+        _update(
+            digest,
+            fcurve.data_path,
+            fcurve.array_index,
+            fcurve.mute,
+            fcurve.extrapolation,
+            tuple(modifier.type for modifier in fcurve.modifiers),
+        )
+
+        keyframe_points = fcurve.keyframe_points
+        count = len(keyframe_points)
+        for attribute in ("co", "handle_left", "handle_right"):
+            values = np.empty(count * 2, dtype=np.float32)
+            keyframe_points.foreach_get(attribute, values)
+            digest.update(values.tobytes())
+        interpolation = np.empty(count, dtype=np.int32)
+        keyframe_points.foreach_get("interpolation", interpolation)
+        digest.update(interpolation.tobytes())
+
+    return animated
+
+
+def _update(digest, *values) -> None:
+    digest.update(repr(values).encode())
+
+
+@persistent
+def depsgraph_update_handler(scene: Scene, depsgraph) -> None:
+    if not _scene_caches and not led_helpers.has_cached_color_inputs():
+        return
+
+    # Materials by their embedded node trees, built only if a node tree was updated
+    tree_materials = None
+    # Depsgraph reports every evaluated datablock, including dependants of the edited one,
+    # so children and constraint users of a changed object are invalidated as well
+    for update in depsgraph.updates:
+        id_data = update.id.original
+        if isinstance(id_data, Object):
+            if update.is_updated_transform:
+                invalidate_object(id_data.name)
+        elif isinstance(id_data, Material):
+            led_helpers.invalidate_color_input(id_data)
+            invalidate_material(id_data.name)
+        elif isinstance(id_data, bpy.types.NodeTree):
+            if tree_materials is None:
+                tree_materials = {
+                    material.node_tree.as_pointer(): material
+                    for material in bpy.data.materials
+                    if material.node_tree is not None
+                }
+            material = tree_materials.get(id_data.as_pointer())
+            if material is not None:
+                led_helpers.invalidate_color_input(material)
+                invalidate_material(material.name)
+
+
+@persistent
+def load_post_handler(*args) -> None:
+    clear()
+    led_helpers.invalidate_color_input()
+
+
+def register():
+    bpy.app.handlers.depsgraph_update_post.append(depsgraph_update_handler)
+    bpy.app.handlers.load_post.append(load_post_handler)
+
+
+def unregister():
+    bpy.app.handlers.depsgraph_update_post.remove(depsgraph_update_handler)
+    bpy.app.handlers.load_post.remove(load_post_handler)
+    clear()
+    led_helpers.invalidate_color_input()
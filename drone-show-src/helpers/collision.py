@@ -0,0 +1,276 @@
+import itertools
+
+import numpy as np
+
+# Offsets to the half of 26 neighbouring cells, so every pair of cells is visited once
+NEIGHBOUR_OFFSETS = [
+    offset
+    for offset in itertools.product((-1, 0, 1), repeat=3)
+    if offset > (0, 0, 0)
+]
+
+# Limit of the number of points sorted at once when checking multiple frames
+CHUNK_POINTS = 1_000_000
+# Share of the shortest motion segments found with the grid in the swept check,
+# the remaining fast segments are checked against all drones of their frame
+GRID_SEGMENTS_QUANTILE = 0.99
+
+
+def find_close_pairs(
+    positions: np.ndarray, limit: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Find pairs of drones closer than the limit on every frame
+
+    Drones are bucketed into a uniform grid with cell size equal to the limit,
+    so only drones from the same or neighbouring cells are compared.
+
+    :param positions: array of drone positions (F, N, 3)
+    :param limit: distance limit
+    :return: arrays of frame indices, first drone indices, second drone indices and distances,
+        sorted by drone pair and then by frame, first drone index is always less than the second
+    """
+    frame_count, drone_count = positions.shape[:2]
+    results = []
+    if limit > 0 and drone_count > 1:
+        chunk_size = max(1, CHUNK_POINTS // drone_count)
+        for start in range(0, frame_count, chunk_size):
+            chunk = positions[start : start + chunk_size]
+            frames, drones1, drones2, distances = _find_close_pairs_chunk(chunk, limit)
+            results.append((frames + start, drones1, drones2, distances))
+
+    return _concatenate_pairs(results)
+
+
+def find_close_pairs_pruned(
+    positions: np.ndarray, limit: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Same as `find_close_pairs`, but skips frames on which drone pairs provably can't be close
+
+    Two drones can't approach each other faster than twice the largest distance any drone moves
+    in one frame, so a pair that is `d` apart can't get closer than the limit for
+    `(d - limit) / closing_speed` frames. The animation is processed in windows: drones close enough
+    to break the limit within a window are found with the grid at the start of the window,
+    and each of these pairs is checked only on frames after its safe horizon.
+    """
+    frame_count, drone_count = positions.shape[:2]
+    if limit <= 0 or drone_count < 2 or frame_count < 2:
+        return find_close_pairs(positions, limit)
+
+    points = positions.astype(np.float64)
+    max_step = np.linalg.norm(np.diff(points, axis=0), axis=-1).max()
+    # Margin keeps the bound conservative despite floating point rounding
+    closing_speed = 2 * max_step * (1 + 1e-6) + 1e-9
+    window = int(min(max(np.ceil(limit / closing_speed), 1), frame_count))
+    if window == 1:
+        # Drones move too fast for pruning, checking multiple frames at once is faster
+        return find_close_pairs(positions, limit)
+    reach = limit + closing_speed * (window - 1)
+
+    results = []
+    for start in range(0, frame_count, window):
+        end = min(start + window, frame_count)
+        frames, drones1, drones2, distances = _find_close_pairs_chunk(
+            positions[start : start + 1], reach
+        )
+
+        # First frame of the window on which the pair may get closer than the limit
+        horizons = np.floor((distances - limit) / closing_speed) + 1
+        horizons = np.where(distances < limit, 0, horizons).astype(np.int64)
+
+        pair_indices, frames = _expand_pairs(
+            np.arange(len(horizons)), start + horizons, np.full(len(horizons), end)
+        )
+        drones1, drones2 = drones1[pair_indices], drones2[pair_indices]
+        distances = np.linalg.norm(points[frames, drones1] - points[frames, drones2], axis=1)
+        close = distances < limit
+        results.append((frames[close], drones1[close], drones2[close], distances[close]))
+
+    return _concatenate_pairs(results)
+
+
+def find_swept_close_pairs(
+    positions: np.ndarray, limit: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Find pairs of drones getting closer than the limit while moving between frames
+
+    Drones are assumed to move linearly between consecutive frames, so the closest approach
+    of two drones is found on their relative motion segment. Only approaches strictly between
+    frames are returned, distances on frames themselves are found by `find_close_pairs`.
+
+    :param positions: array of drone positions (F, N, 3)
+    :param limit: distance limit
+    :return: arrays of frame indices (end frame of the interval), first drone indices,
+        second drone indices and closest approach distances, sorted by drone pair and then by frame
+    """
+    frame_count, drone_count = positions.shape[:2]
+    results = []
+    if limit > 0 and drone_count > 1:
+        chunk_size = max(1, CHUNK_POINTS // drone_count)
+        for start in range(0, frame_count - 1, chunk_size):
+            end = min(start + chunk_size, frame_count - 1)
+            starts = positions[start:end].astype(np.float64)
+            ends = positions[start + 1 : end + 1].astype(np.float64)
+            frames, drones1, drones2, distances = _find_swept_pairs_chunk(starts, ends, limit)
+            results.append((frames + start + 1, drones1, drones2, distances))
+    return _concatenate_pairs(results)
+
+
+def merge_pairs(
+    *pairs: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Merge results of pair searches, keeping the smallest distance for the same pair and frame"""
+    frames, drones1, drones2, distances = (np.concatenate(arrays) for arrays in zip(*pairs))
+    order = np.lexsort((distances, frames, drones2, drones1))
+    frames, drones1, drones2, distances = (
+        frames[order],
+        drones1[order],
+        drones2[order],
+        distances[order],
+    )
+    first = np.ones(len(frames), dtype=bool)
+    first[1:] = (
+        (np.diff(drones1) != 0) | (np.diff(drones2) != 0) | (np.diff(frames) != 0)
+    )
+    return frames[first], drones1[first], drones2[first], distances[first]
+
+
+def _find_close_pairs_chunk(positions: np.ndarray, limit: float):
+    frame_count, drone_count = positions.shape[:2]
+    points = positions.reshape(-1, 3).astype(np.float64)
+    frames = np.repeat(np.arange(frame_count, dtype=np.int64), drone_count)
+    first, second, distances = _find_close_points(points, frames, limit)
+    return first // drone_count, first % drone_count, second % drone_count, distances
+
+
+def _find_close_points(points: np.ndarray, frames: np.ndarray, limit: float):
+    """Find pairs of points from the same frame closer than the limit with a uniform grid
+
+    :param points: array of points (P, 3)
+    :param frames: frame index of every point (P,)
+    :return: arrays of first and second point indices and distances, first index is the lesser one
+    """
+    if len(points) < 2:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=np.float64)
+
+    cells = np.floor(points / limit).astype(np.int64)
+    cells -= cells.min(axis=0) - 1  # Leave empty border for neighbour lookups
+    dims = cells.max(axis=0) + 2
+    cell_keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    # Drones from different frames are never in the same cell
+    keys = frames * (dims[0] * dims[1] * dims[2]) + cell_keys
+
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    sorted_indices = np.arange(len(order))
+
+    # Pairs within the same cell
+    starts = sorted_indices + 1
+    ends = np.searchsorted(sorted_keys, sorted_keys, side="right")
+    candidates = [_expand_pairs(sorted_indices, starts, ends)]
+
+    # Pairs with neighbouring cells
+    for dx, dy, dz in NEIGHBOUR_OFFSETS:
+        neighbour_keys = sorted_keys + (dx * dims[1] + dy) * dims[2] + dz
+        starts = np.searchsorted(sorted_keys, neighbour_keys, side="left")
+        ends = np.searchsorted(sorted_keys, neighbour_keys, side="right")
+        candidates.append(_expand_pairs(sorted_indices, starts, ends))
+
+    first = order[np.concatenate([pairs[0] for pairs in candidates])]
+    second = order[np.concatenate([pairs[1] for pairs in candidates])]
+    first, second = np.minimum(first, second), np.maximum(first, second)
+
+    distances = np.linalg.norm(points[first] - points[second], axis=1)
+    close = distances < limit
+    return first[close], second[close], distances[close]
+
+
+def _find_swept_pairs_chunk(starts: np.ndarray, ends: np.ndarray, limit: float):
+    drone_count = starts.shape[1]
+    starts, ends = starts.reshape(-1, 3), ends.reshape(-1, 3)
+    lengths = np.linalg.norm(ends - starts, axis=1)
+
+    # Grid cells are sized by typical segments, so a few fast drones don't make the grid coarse
+    grid_length = max(limit, np.quantile(lengths, GRID_SEGMENTS_QUANTILE))
+    in_grid = lengths <= grid_length
+    grid_segments = np.flatnonzero(in_grid)
+    fast_segments = np.flatnonzero(~in_grid)
+
+    # Midpoints of two segments are at most half of their lengths away from any of their points,
+    # so pairs with midpoints further than the limit plus the longest segment can't get close
+    midpoints = (starts[grid_segments] + ends[grid_segments]) / 2
+    reach = limit + (lengths[grid_segments].max() if len(grid_segments) else 0)
+    first, second, _ = _find_close_points(midpoints, grid_segments // drone_count, reach)
+    first, second = grid_segments[first], grid_segments[second]
+    results = [_find_swept_approaches(starts, ends, first, second, limit)]
+
+    # Fast segments are paired with all other drones of their frame, pairs of two fast ones once
+    batch_size = max(1, CHUNK_POINTS // drone_count)
+    drones = np.arange(drone_count)
+    for batch_start in range(0, len(fast_segments), batch_size):
+        batch = fast_segments[batch_start : batch_start + batch_size]
+        first = np.repeat(batch, drone_count)
+        frame_offsets = batch // drone_count * drone_count
+        second = np.repeat(frame_offsets, drone_count) + np.tile(drones, len(batch))
+        candidate = in_grid[second] | (second > first)
+        first, second = first[candidate], second[candidate]
+        first, second = np.minimum(first, second), np.maximum(first, second)
+        results.append(_find_swept_approaches(starts, ends, first, second, limit))
+
+    first, second, distances = (np.concatenate(arrays) for arrays in zip(*results))
+    return first // drone_count, first % drone_count, second % drone_count, distances
+
+
+def _find_swept_approaches(
+    starts: np.ndarray, ends: np.ndarray, first: np.ndarray, second: np.ndarray, limit: float
+):
+    """Closest approaches of segment pairs getting closer than the limit strictly between frames
+
+    :param starts: segment starts (P, 3)
+    :param ends: segment ends (P, 3)
+    :param first: first segment indices of candidate pairs
+    :param second: second segment indices of candidate pairs
+    """
+    lower, upper = np.minimum(starts, ends), np.maximum(starts, ends)
+    overlap = np.all(
+        (lower[first] - limit < upper[second]) & (lower[second] - limit < upper[first]),
+        axis=1,
+    )
+    first, second = first[overlap], second[overlap]
+
+    relative_start = starts[first] - starts[second]
+    relative_motion = ends[first] - ends[second] - relative_start
+    motion_squared = np.sum(relative_motion * relative_motion, axis=1)
+    approach = -np.sum(relative_start * relative_motion, axis=1)
+    times = np.divide(
+        approach,
+        motion_squared,
+        out=np.zeros_like(approach),
+        where=motion_squared > 0,
+    )
+    distances = np.linalg.norm(relative_start + times[:, None] * relative_motion, axis=1)
+
+    close = (distances < limit) & (times > 0) & (times < 1)
+    return first[close], second[close], distances[close]
+
+
+def _concatenate_pairs(results):
+    if not results:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty, np.empty(0, dtype=np.float64)
+
+    frames, drones1, drones2, distances = (np.concatenate(arrays) for arrays in zip(*results))
+    order = np.lexsort((frames, drones2, drones1))
+    return frames[order], drones1[order], drones2[order], distances[order]
+
+
+def _expand_pairs(
+    indices: np.ndarray, starts: np.ndarray, ends: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Pair each index with every position in its [start, end) range"""
+    counts = np.maximum(ends - starts, 0)
+    total = counts.sum()
+    first = np.repeat(indices, counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    second = np.repeat(starts, counts) + offsets
+    return first, second
@@ -0,0 +1,228 @@
+import csv
+import hashlib
+import io
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from ..helpers.animation import ShowTrajectory
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Larger values are printed by `repr` in exponent notation or with fewer than 3 decimals,
+# so animations with them are written with `csv.writer`
+MAX_FORMATTED_VALUE = 1e9
+
+# Groups of 4 decimal digits as ASCII codes packed in uint32, indexed by the group value,
+# with leading zeros and with leading zeros replaced by zero bytes (keeping the last digit)
+DIGIT_GROUPS = np.array(
+    [f"{group:04d}".encode() for group in range(10000)], dtype="S4"
+).view(np.uint32)
+STRIPPED_DIGIT_GROUPS = np.array(
+    [f"{group:d}".encode().rjust(4, b"\0") for group in range(10000)], dtype="S4"
+).view(np.uint32)
+# Fractional parts rounded to 3 digits as printed by `repr` packed in uint32, indexed by thousandths,
+# trailing zeros are replaced with zero bytes, but one digit is always kept
+FRACTIONS = np.array(
+    [
+        ("." + f"{thousandths:03d}".rstrip("0")).ljust(2, "0").encode().ljust(4, b"\0")
+        for thousandths in range(1000)
+    ],
+    dtype="S4",
+).view(np.uint32)
+MINUS = np.uint8(ord("-"))
+
+
+def write_animation_csv(
+    filepath: Path,
+    trajectory: "ShowTrajectory",
+    drone_index: int,
+    title: str,
+    frame_indices: Optional[np.ndarray] = None,
+    include_led=True,
+) -> None:
+    """Write animation of a single drone to a CSV file
+
+    Each row contains frame number, position, yaw (rounded to 3 digits) and LED color.
+    The output is the same as writing rows with `csv.writer` with rounded Python floats.
+    Only frames with given indices are written if `frame_indices` is set.
+    """
+    body = format_animation_rows(trajectory, drone_index, frame_indices, include_led)
+    _write_csv(filepath, title, body)
+
+
+def write_led_runs_csv(
+    filepath: Path, trajectory: "ShowTrajectory", drone_index: int, title: str
+) -> None:
+    """Write LED colors of a single drone to a CSV file as runs of the same color
+
+    Each row contains first frame, last frame and color of the run.
+    """
+    starts, ends, colors = led_runs(trajectory.led[:, drone_index])
+    color_codes = _format_integers(colors)
+    fields = [
+        _format_integers(trajectory.frames[starts]),
+        _format_integers(trajectory.frames[ends]),
+        *(color_codes[:, channel] for channel in range(3)),
+    ]
+    _write_csv(filepath, title, _join_rows(fields))
+
+
+def led_runs(led: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Split LED colors (F, 3) into runs of the same color
+
+    :return: indices of first and last frames of runs and colors of runs
+    """
+    if not len(led):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), led
+    changes = np.flatnonzero(np.any(led[1:] != led[:-1], axis=1)) + 1
+    starts = np.concatenate(([0], changes))
+    ends = np.concatenate((changes - 1, [len(led) - 1]))
+    return starts, ends, led[starts]
+
+
+def format_animation_rows(
+    trajectory: "ShowTrajectory",
+    drone_index: int,
+    frame_indices: Optional[np.ndarray] = None,
+    include_led=True,
+) -> str:
+    if frame_indices is None:
+        frame_indices = np.arange(trajectory.frame_count)
+    values = np.column_stack(
+        (
+            trajectory.positions[frame_indices, drone_index].astype(np.float64),
+            trajectory.yaw[frame_indices, drone_index],
+        )
+    )
+    row_length = 8 if include_led else 5
+    if not np.all(np.abs(values) < MAX_FORMATTED_VALUE):
+        export_rows = list(trajectory.export_rows(drone_index))
+        rows = io.StringIO()
+        csv.writer(rows).writerows(
+            export_rows[index][:row_length] for index in frame_indices.tolist()
+        )
+        return rows.getvalue()
+
+    value_codes = _format_rounded(values)
+    fields = [_format_integers(trajectory.frames[frame_indices])]
+    fields.extend(value_codes[:, column] for column in range(4))
+    if include_led:
+        led_codes = _format_integers(trajectory.led[frame_indices, drone_index])
+        fields.extend(led_codes[:, channel] for channel in range(3))
+
+    return _join_rows(fields)
+
+
+def _write_csv(filepath: Path, title: str, body: str) -> None:
+    header = io.StringIO()
+    csv.writer(header, delimiter=",", quotechar="|", quoting=csv.QUOTE_MINIMAL).writerow(
+        [title]
+    )
+    with open(filepath, "w") as csv_file:
+        csv_file.write(header.getvalue() + body)
+
+
+def _join_rows(fields: list[np.ndarray]) -> str:
+    """Join fields into CSV rows the same way as `csv.writer`
+
+    :param fields: ASCII codes of every field (R, width), padded with zero bytes
+    """
+    row_count = len(fields[0])
+    separator = np.full((row_count, 1), ord(","), dtype=np.uint8)
+    line_end = np.broadcast_to(np.frombuffer(b"\r\n", dtype=np.uint8), (row_count, 2))
+    table = np.hstack([part for field in fields for part in (field, separator)][:-1] + [line_end])
+    codes = table.ravel()
+    return np.compress(codes != 0, codes).tobytes().decode("ascii")
+
+
+def _format_rounded(values: np.ndarray) -> np.ndarray:
+    """ASCII codes of values rounded to 3 digits (..., width) the same way as `repr(round(value, 3))`
+
+    Rounding matches Python's `round`: half to even on the exact binary value.
+    Products of float32 values and 1000 are exact in float64, values that may be
+    not exact and close to a rounding tie are rounded with Python.
+    """
+    scaled = values * 1000
+    thousandths = np.rint(scaled)
+
+    near_tie = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    for index in zip(*np.nonzero(near_tie)):
+        thousandths[index] = round(round(float(values[index]), 3) * 1000)
+
+    thousandths = np.abs(thousandths).astype(np.int64)
+    signs = np.signbit(values).view(np.uint8) * MINUS
+    integers, fractions = np.divmod(thousandths, 1000)
+    return np.concatenate(
+        (signs[..., None], _digits(integers), _as_bytes(FRACTIONS[fractions][..., None])),
+        axis=-1,
+    )
+
+
+def _format_integers(numbers: np.ndarray) -> np.ndarray:
+    """ASCII codes of integers (..., width), padded with zero bytes"""
+    numbers = numbers.astype(np.int64)
+    signs = (numbers < 0).view(np.uint8) * MINUS
+    return np.concatenate((signs[..., None], _digits(np.abs(numbers))), axis=-1)
+
+
+def _digits(numbers: np.ndarray) -> np.ndarray:
+    """ASCII codes of decimal digits of non-negative integers (..., width), padded with zero bytes"""
+    group_count = -(-len(str(numbers.max())) // 4) if numbers.size else 1
+    divisors = 10000 ** np.arange(group_count - 1, -1, -1, dtype=np.int64)
+
+    # Leading zeros are dropped up to the first non-zero group
+    leading = np.ones(numbers.shape, dtype=bool)
+    groups = []
+    for index, divisor in enumerate(divisors.tolist()):
+        group = numbers // divisor % 10000
+        codes = np.where(leading, STRIPPED_DIGIT_GROUPS[group], DIGIT_GROUPS[group])
+        if index < group_count - 1:
+            leading &= group == 0
+            codes[leading] = 0
+        groups.append(codes)
+    return _as_bytes(np.stack(groups, axis=-1))
+
+
+def _as_bytes(codes: np.ndarray) -> np.ndarray:
+    """View packed uint32 codes (..., count) as ASCII codes (..., 4 * count)"""
+    return np.ascontiguousarray(codes).view(np.uint8)
+
+
+def drone_hash(trajectory: "ShowTrajectory", drone_index: int, parameters: dict) -> str:
+    """Hash of the exported animation of a drone together with export parameters"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps(parameters, sort_keys=True).encode())
+    digest.update(trajectory.drones[drone_index].encode())
+    for values in (
+        trajectory.frames,
+        trajectory.positions[:, drone_index],
+        trajectory.yaw[:, drone_index],
+        trajectory.led[:, drone_index],
+    ):
+        digest.update(np.ascontiguousarray(values).tobytes())
+    return digest.hexdigest()
+
+
+def read_manifest(base_dir: Path) -> dict[str, str]:
+    """Read drone hashes of the previous export, missing or unreadable manifest is treated as empty"""
+    try:
+        with open(base_dir / MANIFEST_NAME) as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return dict()
+
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return dict()
+    return manifest.get("drones", dict())
+
+
+def write_manifest(base_dir: Path, parameters: dict, hashes: dict[str, str]) -> None:
+    manifest = {"version": MANIFEST_VERSION, "parameters": parameters, "drones": hashes}
+    with open(base_dir / MANIFEST_NAME, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
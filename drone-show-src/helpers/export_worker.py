@@ -0,0 +1,60 @@
+"""Background Blender worker extracting drone animation for a range of frames
+
+Started by `ParallelExtractor` as `blender -b <file> --python export_worker.py -- <job file>`.
+The job file is a JSON object with the add-on package location, scene name, frame range,
+drone names with their LED material names, the output file path and the error file path.
+Animation is saved to the output file as `.npz` arrays of positions, yaw and LED colors.
+If extraction fails, the exception is written to the error file, so all workers failing
+the same way can be reported once.
+"""
+
+import importlib
+import json
+import sys
+import traceback
+from pathlib import Path
+
+import numpy as np
+
+import bpy
+
+
+def main(job_path: str) -> None:
+    job = json.loads(Path(job_path).read_text())
+    try:
+        extract(job)
+    except Exception as e:
+        Path(job["error"]).write_text("".join(traceback.format_exception_only(e)).strip())
+        raise
+
+
+def extract(job: dict) -> None:
+    # Script is not run as a part of the add-on package and Blender is started with factory
+    # settings, so the add-on is imported and registered explicitly to define its properties
+    sys.path.insert(0, job["package_path"])
+    addon = importlib.import_module(job["package"])
+    addon.register()
+    animation_helpers = importlib.import_module(f"{job['package']}.helpers.animation")
+
+    scene = bpy.data.scenes[job["scene"]]
+    drones = {
+        bpy.data.objects[name]: bpy.data.materials[material] if material is not None else None
+        for name, material in job["drones"]
+    }
+    frames = range(job["frame_start"], job["frame_end"] + 1)
+
+    extractor = animation_helpers.TrajectoryExtractor(scene, drones, frames)
+    while not extractor.done:
+        extractor.step()
+
+    trajectory = extractor.trajectory
+    np.savez(
+        job["output"],
+        positions=trajectory.positions,
+        yaw=trajectory.yaw,
+        led=trajectory.led,
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[sys.argv.index("--") + 1])
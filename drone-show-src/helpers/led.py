@@ -1,6 +1,33 @@
 from typing import Optional, cast
 
-from bpy.types import Material, Object
+import numpy as np
+
+import bpy
+from bpy.types import ID, FCurve, Keyframe, Material, Object
+
+# Keyframe attributes read and written in bulk: name, values per keyframe, array type
+KEYFRAME_ATTRIBUTES = (
+    ("co", 2, np.float32),
+    ("handle_left", 2, np.float32),
+    ("handle_right", 2, np.float32),
+    ("interpolation", 1, np.int32),
+    ("handle_left_type", 1, np.int32),
+    ("handle_right_type", 1, np.int32),
+    ("type", 1, np.int32),
+    ("easing", 1, np.int32),
+    ("amplitude", 1, np.float32),
+    ("back", 1, np.float32),
+    ("period", 1, np.float32),
+    ("select_control_point", 1, bool),
+    ("select_left_handle", 1, bool),
+    ("select_right_handle", 1, bool),
+)
+
+# Name of the LED material shared by drones, which takes LED color from the object color
+OBJECT_COLOR_MATERIAL = "LED object color"
+
+# Paths of resolved LED color inputs in node trees, keyed by material session UID
+_color_input_paths: dict[int, str] = dict()
 
 
 class LedError(RuntimeError):
@@ -20,13 +47,91 @@ def get_material_color(material: Material) -> tuple[int, int, int]:
         value = _get_material_node_input(material).default_value
     else:
         value = material.diffuse_color
+    return _to_rgb(value)
+
+
+def get_led_color(drone_obj: Object, material: Material) -> tuple[int, int, int]:
+    """Get LED color of the drone, taken from the object color if the material uses it"""
+    if material.led.use_object_color:
+        return _to_rgb(drone_obj.color)
+    return get_material_color(material)
+
+
+def get_led_color_property(
+    drone_obj: Object, material: Material
+) -> tuple[ID, str, tuple[float, ...]]:
+    """Get datablock, data path and current value of the property holding LED color of the drone"""
+    if material.led.use_object_color:
+        return drone_obj, "color", tuple(drone_obj.color)
+    return get_material_color_property(material)
 
+
+def _to_rgb(value) -> tuple[int, int, int]:
     alpha = value[3]
     color = tuple(int(value[component] * alpha * 255) for component in range(3))
     return cast(tuple[int, int, int], color)
 
 
+def get_material_color_property(material: Material) -> tuple[ID, str, tuple[float, ...]]:
+    """Get datablock, data path and current value of the property holding LED color"""
+    if material.use_nodes:
+        color_input = _get_material_node_input(material)
+        return (
+            material.node_tree,
+            color_input.path_from_id("default_value"),
+            tuple(color_input.default_value),
+        )
+    return material, "diffuse_color", tuple(material.diffuse_color)
+
+
+def colors_to_rgb(values: np.ndarray) -> np.ndarray:
+    """Vectorized version of LED color conversion done by `get_material_color`
+
+    Takes array of RGBA colors in the last dimension and returns array of 8-bit RGB colors.
+    """
+    values = values.astype(np.float64)
+    color = (values[..., :3] * values[..., 3:4] * 255).astype(np.int64)
+    return np.clip(color, 0, 255).astype(np.uint8)
+
+
+def hue_to_rgba(hues: np.ndarray) -> np.ndarray:
+    """Vectorized version of `Color.hsv = (hue, 1, 1)` for an array of hues, with alpha 1
+
+    Returns array of the shape of hues with RGBA colors in the last dimension.
+    """
+    hues = np.asarray(hues, dtype=np.float64)[..., None] * 6
+    rgb = np.abs(hues - (3, 2, 4)) * (1, -1, -1) + (-1, 2, 2)
+    return np.concatenate((np.clip(rgb, 0, 1), np.ones_like(hues)), axis=-1)
+
+
+def invalidate_color_input(material: Optional[Material] = None) -> None:
+    """Forget resolved LED color input of the material (or of all materials)"""
+    if material is None:
+        _color_input_paths.clear()
+    else:
+        _color_input_paths.pop(material.session_uid, None)
+
+
+def has_cached_color_inputs() -> bool:
+    """Whether LED color input of any material is resolved and cached"""
+    return bool(_color_input_paths)
+
+
 def _get_material_node_input(material: Material):
+    """Get node input holding LED color, resolved once and cached until the node tree changes"""
+    path = _color_input_paths.get(material.session_uid)
+    if path is not None:
+        try:
+            return material.node_tree.path_resolve(path)
+        except ValueError:
+            pass
+
+    color_input = _find_material_node_input(material)
+    _color_input_paths[material.session_uid] = color_input.path_from_id()
+    return color_input
+
+
+def _find_material_node_input(material: Material):
     supported_nodes = ("EMISSION", "BSDF_DIFFUSE", "BSDF_PRINCIPLED")
     nodes = material.node_tree.nodes
     links = material.node_tree.links
@@ -59,3 +164,169 @@ def set_material_color(
         material.diffuse_color = color
         if keyframe is not None:
             material.keyframe_insert("diffuse_color", frame=keyframe)
+
+
+def set_led_color_keyframes(
+    drone_obj: Object, material: Material, frames: np.ndarray, colors: np.ndarray
+) -> None:
+    """Set LED color keyframes of the drone on many frames at once
+
+    Same result as calling `set_material_color` for every frame in order, but F-curves
+    are written in bulk with `foreach_set` instead of inserting keyframes one by one.
+    Existing keyframes on the same frames are replaced, LED keeps the last color.
+    Materials using object color are not changed, keyframes are set to the object color instead.
+
+    :param frames: frame numbers (K,)
+    :param colors: RGBA colors (K, 4)
+    """
+    frames = np.asarray(frames, dtype=np.float32)
+    colors = np.asarray(colors, dtype=np.float32).reshape(len(frames), -1)
+    if not len(frames):
+        return
+    if material.led.use_object_color:
+        drone_obj.color = colors[-1].tolist()
+    else:
+        set_material_color(material, tuple(colors[-1].tolist()))
+
+    # The last color on the same frame wins, same as inserting keyframes in order
+    _, last = np.unique(frames[::-1], return_index=True)
+    last = len(frames) - 1 - last
+    frames, colors = frames[last], colors[last]
+
+    id_data, data_path, _ = get_led_color_property(drone_obj, material)
+    for index in range(colors.shape[1]):
+        fcurve = _get_fcurve(id_data, data_path, index)
+        _set_fcurve_keyframes(fcurve, frames, colors[:, index])
+    id_data.update_tag()
+
+
+def get_object_color_material() -> Material:
+    """Get or create the LED material shared by drones, which takes LED color from `Object.color`
+
+    The material is found by its flag, so renaming it or having another material
+    with the same name doesn't create duplicates.
+    """
+    for material in bpy.data.materials:
+        if material.led.is_led and material.led.use_object_color:
+            return material
+
+    material = bpy.data.materials.new(OBJECT_COLOR_MATERIAL)
+    material.use_nodes = True
+    nodes = material.node_tree.nodes
+    links = material.node_tree.links
+    nodes.clear()
+
+    attribute = nodes.new("ShaderNodeAttribute")
+    attribute.attribute_type = "OBJECT"
+    attribute.attribute_name = "color"
+    attribute.location = (-400, 0)
+    emission = nodes.new("ShaderNodeEmission")
+    emission.location = (-200, 0)
+    output = nodes.new("ShaderNodeOutputMaterial")
+    output.name = "Material Output"
+    links.new(attribute.outputs["Color"], emission.inputs["Color"])
+    links.new(emission.outputs["Emission"], output.inputs["Surface"])
+
+    material.led.is_led = True
+    material.led.use_object_color = True
+    return material
+
+
+def use_object_color(drone_obj: Object, material: Material) -> None:
+    """Move LED color of the drone with its animation to the object color
+    and replace LED material with the shared object color material
+    """
+    id_data, data_path, value = get_material_color_property(material)
+    drone_obj.color = value
+
+    animation_data = drone_obj.animation_data
+    if animation_data is not None and animation_data.action is not None:
+        for fcurve in list(animation_data.action.fcurves):
+            if fcurve.data_path == "color":
+                animation_data.action.fcurves.remove(fcurve)
+
+    source_animation = id_data.animation_data
+    if source_animation is not None and source_animation.action is not None:
+        for source in source_animation.action.fcurves:
+            if source.data_path != data_path or source.mute:
+                continue
+            _copy_keyframes(source, _get_fcurve(drone_obj, "color", source.array_index))
+
+    shared_material = get_object_color_material()
+    for slot in drone_obj.material_slots:
+        if slot.material == material:
+            slot.material = shared_material
+
+
+def _get_fcurve(id_data: ID, data_path: str, index: int) -> FCurve:
+    animation_data = id_data.animation_data or id_data.animation_data_create()
+    if animation_data.action is None:
+        animation_data.action = bpy.data.actions.new(f"{id_data.name}Action")
+    fcurves = animation_data.action.fcurves
+    fcurve = fcurves.find(data_path, index=index)
+    if fcurve is None:
+        fcurve = fcurves.new(data_path, index=index)
+    return fcurve
+
+
+def _copy_keyframes(source: FCurve, target: FCurve) -> None:
+    count = len(source.keyframe_points)
+    target.keyframe_points.add(count)
+    for name, size, dtype in KEYFRAME_ATTRIBUTES:
+        values = np.empty(count * size, dtype=dtype)
+        source.keyframe_points.foreach_get(name, values)
+        target.keyframe_points.foreach_set(name, values)
+    target.extrapolation = source.extrapolation
+    target.update()
+
+
+def _set_fcurve_keyframes(fcurve: FCurve, frames: np.ndarray, values: np.ndarray) -> None:
+    """Set F-curve values on sorted unique frames, keeping other keyframes"""
+    keyframe_points = fcurve.keyframe_points
+    existing_count = len(keyframe_points)
+    co = np.empty(existing_count * 2, dtype=np.float32)
+    keyframe_points.foreach_get("co", co)
+
+    # Keyframes already on the frames are reused, same as with `keyframe_insert`
+    existing_frames = co[0::2]
+    if existing_count:
+        positions = np.searchsorted(existing_frames, frames).clip(max=existing_count - 1)
+        replaced = existing_frames[positions] == frames
+    else:
+        positions = np.zeros(len(frames), dtype=np.int64)
+        replaced = np.zeros(len(frames), dtype=bool)
+    added_count = int(np.count_nonzero(~replaced))
+    keyframe_points.add(added_count)
+    count = existing_count + added_count
+
+    attributes = dict()
+    for name, size, dtype in KEYFRAME_ATTRIBUTES:
+        values_array = np.empty(count * size, dtype=dtype)
+        keyframe_points.foreach_get(name, values_array)
+        attributes[name] = values_array.reshape(count, size)
+
+    # Indices of keyframes holding the new values: reused ones, then added ones
+    targets = np.empty(len(frames), dtype=np.int64)
+    targets[replaced] = positions[replaced]
+    targets[~replaced] = np.arange(existing_count, count)
+
+    points = np.column_stack((frames, values))
+    for name in ("co", "handle_left", "handle_right"):
+        attributes[name][targets] = points
+
+    edit_preferences = bpy.context.preferences.edit
+    added = np.arange(existing_count, count)
+    attributes["interpolation"][added] = _enum_value(
+        "interpolation", edit_preferences.keyframe_new_interpolation_type
+    )
+    for name in ("handle_left_type", "handle_right_type"):
+        attributes[name][added] = _enum_value(name, edit_preferences.keyframe_new_handle_type)
+
+    order = np.argsort(attributes["co"][:, 0], kind="stable")
+    for name, values_array in attributes.items():
+        keyframe_points.foreach_set(name, values_array[order].ravel())
+    fcurve.update()
+
+
+def _enum_value(attribute: str, identifier: str) -> int:
+    return Keyframe.bl_rna.properties[attribute].enum_items[identifier].value
@@ -0,0 +1,132 @@
+"""Parametric LED effects evaluated for all drones and frames at once
+
+Patterns map drone positions (F, N, 3) and times in seconds (F,) to values (F, N) in [0, 1],
+which are turned into RGBA colors (F, N, 4) by blending two colors or by a rainbow hue.
+"""
+
+import itertools
+
+import numpy as np
+
+from ..helpers import led as led_helpers
+
+
+def linear_phase(
+    positions: np.ndarray,
+    times: np.ndarray,
+    direction: np.ndarray,
+    wavelength: float,
+    speed: float,
+) -> np.ndarray:
+    """Phase of a plane sweep moving along the direction, in periods
+
+    :param wavelength: distance between repeats of the effect (meters)
+    :param speed: number of repeats passing a drone per second
+    """
+    direction = np.asarray(direction, dtype=np.float64)
+    direction = direction / max(np.linalg.norm(direction), 1e-9)
+    return positions @ direction / wavelength - speed * times[:, None]
+
+
+def radial_phase(
+    positions: np.ndarray,
+    times: np.ndarray,
+    center: np.ndarray,
+    wavelength: float,
+    speed: float,
+) -> np.ndarray:
+    """Phase of a spherical sweep moving out of the center, in periods"""
+    distances = np.linalg.norm(positions - np.asarray(center, dtype=np.float64), axis=-1)
+    return distances / wavelength - speed * times[:, None]
+
+
+def gradient(phase: np.ndarray) -> np.ndarray:
+    """Linear ramp going back and forth, so repeats of the gradient have no seams"""
+    return 1 - np.abs(2 * np.mod(phase, 1) - 1)
+
+
+def wave(phase: np.ndarray) -> np.ndarray:
+    return 0.5 - 0.5 * np.cos(2 * np.pi * phase)
+
+
+def pulse(phase: np.ndarray, width: float) -> np.ndarray:
+    """Band of the given width (fraction of the period) fading out from its middle"""
+    offsets = np.abs(np.mod(phase + 0.5, 1) - 0.5)
+    return np.clip(1 - offsets / max(width / 2, 1e-9), 0, 1)
+
+
+def noise(
+    positions: np.ndarray, times: np.ndarray, scale: float, speed: float, seed=0
+) -> np.ndarray:
+    """Smooth value noise over space and time
+
+    :param scale: size of noise features (meters)
+    :param speed: rate of noise change (features per second)
+    """
+    frame_count, drone_count = positions.shape[:2]
+    points = np.empty((frame_count, drone_count, 4))
+    points[..., :3] = positions / max(scale, 1e-9)
+    points[..., 3] = (speed * times)[:, None]
+    return value_noise(points, seed)
+
+
+def value_noise(points: np.ndarray, seed=0) -> np.ndarray:
+    """Value noise in [0, 1] with random values on the integer lattice interpolated with smoothstep
+
+    :param points: coordinates in the last dimension
+    """
+    cells = np.floor(points)
+    fractions = points - cells
+    weights = fractions * fractions * (3 - 2 * fractions)
+    cells = cells.astype(np.int64)
+
+    result = np.zeros(points.shape[:-1])
+    dimensions = points.shape[-1]
+    for corner in itertools.product((0, 1), repeat=dimensions):
+        corner_weight = np.ones(points.shape[:-1])
+        for axis, offset in enumerate(corner):
+            corner_weight *= weights[..., axis] if offset else 1 - weights[..., axis]
+        result += corner_weight * _lattice_values(cells + corner, seed)
+    return result
+
+
+def project_image(
+    positions: np.ndarray, pixels: np.ndarray, axes: tuple[int, int] = (0, 1)
+) -> np.ndarray:
+    """Colors of image pixels projected onto drones along the remaining axis
+
+    The image is fitted to the bounds of all drone positions on the projection plane.
+
+    :param pixels: image pixels (H, W, 4), first row is the bottom of the image
+    :param axes: position axes along the image width and height
+    """
+    coordinates = positions[..., list(axes)]
+    lower = coordinates.reshape(-1, 2).min(axis=0)
+    upper = coordinates.reshape(-1, 2).max(axis=0)
+    uv = (coordinates - lower) / np.maximum(upper - lower, 1e-9)
+
+    height, width = pixels.shape[:2]
+    columns = np.rint(uv[..., 0] * (width - 1)).astype(np.int64)
+    rows = np.rint(uv[..., 1] * (height - 1)).astype(np.int64)
+    return pixels[rows, columns]
+
+
+def blend(values: np.ndarray, color_a, color_b) -> np.ndarray:
+    color_a = np.asarray(color_a, dtype=np.float64)
+    color_b = np.asarray(color_b, dtype=np.float64)
+    return color_a + values[..., None] * (color_b - color_a)
+
+
+def rainbow(values: np.ndarray) -> np.ndarray:
+    return led_helpers.hue_to_rgba(np.mod(values, 1))
+
+
+def _lattice_values(cells: np.ndarray, seed: int) -> np.ndarray:
+    """Pseudo-random values in [0, 1) for integer lattice points"""
+    hashes = np.full(cells.shape[:-1], seed * 0x9E3779B1 + 0x632BE5AB, dtype=np.uint64)
+    primes = (0x8DA6B343, 0xD8163841, 0xCB1AB31F, 0x165667B1)
+    for axis in range(cells.shape[-1]):
+        hashes ^= cells[..., axis].astype(np.uint64) * np.uint64(primes[axis % len(primes)])
+        hashes = (hashes ^ (hashes >> np.uint64(15))) * np.uint64(0x2C1B3C6D)
+    hashes ^= hashes >> np.uint64(32)
+    return (hashes & np.uint64(0xFFFFFF)).astype(np.float64) / 0x1000000
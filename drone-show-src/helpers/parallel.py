@@ -0,0 +1,239 @@
+import json
+import shutil
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+import bpy
+from bpy.types import Material, Object, Scene
+
+from ..helpers import animation as animation_helpers
+
+WORKER_SCRIPT = Path(__file__).with_name("export_worker.py")
+PACKAGE = __package__.rpartition(".")[0]
+PACKAGE_PATH = Path(__file__).parents[2]
+
+# Time to wait for workers on every step (seconds)
+POLL_INTERVAL = 0.01
+
+
+@dataclass()
+class WorkerJob:
+    frames: range
+    frame_offset: int  # Index of the first frame of the job in the extracted trajectory
+    job_path: Path
+    output_path: Path
+    log_path: Path
+    error_path: Path
+    process: Optional[subprocess.Popen] = None
+    start_time: float = 0
+
+
+class ParallelExtractor:
+    """Extraction of drone animation split by frame ranges between background Blender processes
+
+    The current state of the file is saved to a temporary copy, which is opened by every worker.
+    Frame ranges of failed or timed out workers are extracted in this process instead.
+    Workers start evaluation in the middle of the timeline, so animation depending on simulation
+    history (rigid body, physics without baked caches) may differ from a single process export.
+    Has the same interface as `TrajectoryExtractor`, progress is counted in extracted frames.
+    """
+
+    def __init__(
+        self,
+        scene: Scene,
+        drones: dict[Object, Optional[Material]],
+        workers: int,
+        timeout: float,
+    ):
+        self.scene = scene
+        self.drones = drones
+        self.frames = range(scene.frame_start, scene.frame_end + 1)
+        self.trajectory = animation_helpers.ShowTrajectory.empty(
+            [drone_obj.name for drone_obj in drones], self.frames
+        )
+        self.worker_count = max(1, min(workers, len(self.frames)))
+        self.timeout = timeout
+
+        self.processed = 0
+        self.total = len(self.frames) if drones else 0
+
+        self._directory: Optional[Path] = None
+        self._running: list[WorkerJob] = list()
+        self._failed: list[WorkerJob] = list()
+        self._failures: list[tuple[WorkerJob, str]] = list()
+        self._fallback: Optional[tuple[WorkerJob, animation_helpers.TrajectoryExtractor]] = None
+
+    @property
+    def done(self) -> bool:
+        return self.processed >= self.total
+
+    @property
+    def warnings(self) -> list[str]:
+        """Messages about failed workers, a single one if all workers failed the same way"""
+        reasons = {reason for _, reason in self._failures}
+        if len(self._failures) == self.worker_count and len(reasons) == 1:
+            return [
+                f"All {self.worker_count} export workers failed: {reasons.pop()}. "
+                f"Animation was extracted in this process instead"
+            ]
+        return [
+            f"Worker for frames {job.frames.start}-{job.frames.stop - 1} failed: {reason}. "
+            f"These frames were extracted in this process instead"
+            for job, reason in self._failures
+        ]
+
+    def step(self) -> None:
+        if self._directory is None:
+            self._start()
+        elif self._fallback is not None:
+            self._step_fallback()
+        elif self._running:
+            self._poll()
+        elif self._failed:
+            job = self._failed.pop(0)
+            extractor = animation_helpers.TrajectoryExtractor(self.scene, self.drones, job.frames)
+            self._fallback = (job, extractor)
+
+        if self.done:
+            self._cleanup()
+
+    def cancel(self) -> None:
+        for job in self._running:
+            job.process.kill()
+            job.process.wait()
+        self._running.clear()
+        if self._fallback is not None:
+            self._fallback[1].cancel()
+            self._fallback = None
+        self._cleanup()
+
+    def _start(self) -> None:
+        self._directory = Path(tempfile.mkdtemp(prefix="drone_show_"))
+        blend_path = self._directory / "show.blend"
+        bpy.ops.wm.save_as_mainfile(filepath=str(blend_path), copy=True, check_existing=False)
+
+        drones = [
+            (drone_obj.name, led_material.name if led_material is not None else None)
+            for drone_obj, led_material in self.drones.items()
+        ]
+        frame_indices = np.array_split(np.arange(len(self.frames)), self.worker_count)
+        for worker, indices in enumerate(frame_indices):
+            frames = self.frames[indices[0] : indices[-1] + 1]
+            job = WorkerJob(
+                frames=frames,
+                frame_offset=int(indices[0]),
+                job_path=self._directory / f"job_{worker}.json",
+                output_path=self._directory / f"worker_{worker}.npz",
+                log_path=self._directory / f"worker_{worker}.log",
+                error_path=self._directory / f"worker_{worker}.error",
+            )
+            job.job_path.write_text(
+                json.dumps(
+                    {
+                        "package": PACKAGE,
+                        "package_path": str(PACKAGE_PATH),
+                        "scene": self.scene.name,
+                        "frame_start": frames.start,
+                        "frame_end": frames.stop - 1,
+                        "drones": drones,
+                        "output": str(job.output_path),
+                        "error": str(job.error_path),
+                    }
+                )
+            )
+            self._launch(job, blend_path)
+
+    def _launch(self, job: WorkerJob, blend_path: Path) -> None:
+        command = [
+            bpy.app.binary_path,
+            "--background",
+            "--factory-startup",
+            str(blend_path),
+            "--python-exit-code",
+            "1",
+            "--python",
+            str(WORKER_SCRIPT),
+            "--",
+            str(job.job_path),
+        ]
+        if bpy.context.preferences.filepaths.use_scripts_auto_execute:
+            command.insert(3, "--enable-autoexec")
+
+        try:
+            with open(job.log_path, "w") as log_file:
+                job.process = subprocess.Popen(
+                    command, stdout=log_file, stderr=subprocess.STDOUT
+                )
+        except OSError as e:
+            self._fail(job, f"could not start Blender ({e})")
+            return
+        job.start_time = time.perf_counter()
+        self._running.append(job)
+
+    def _poll(self) -> None:
+        time.sleep(POLL_INTERVAL)
+        for job in list(self._running):
+            return_code = job.process.poll()
+            if return_code is None:
+                if time.perf_counter() - job.start_time > self.timeout:
+                    job.process.kill()
+                    job.process.wait()
+                    self._running.remove(job)
+                    self._fail(job, f"timed out after {self.timeout:.0f}s")
+                continue
+
+            self._running.remove(job)
+            if return_code != 0 or not job.output_path.exists():
+                self._fail(job, _read_error(job, return_code))
+                continue
+
+            try:
+                with np.load(job.output_path) as output:
+                    self._store(job, output["positions"], output["yaw"], output["led"])
+            except (OSError, ValueError, KeyError) as e:
+                self._fail(job, f"produced unreadable output ({e})")
+
+    def _step_fallback(self) -> None:
+        job, extractor = self._fallback
+        extractor.step()
+        if extractor.done:
+            trajectory = extractor.trajectory
+            self._store(job, trajectory.positions, trajectory.yaw, trajectory.led)
+            self._fallback = None
+
+    def _store(self, job: WorkerJob, positions, yaw, led) -> None:
+        frame_slice = slice(job.frame_offset, job.frame_offset + len(job.frames))
+        self.trajectory.positions[frame_slice] = positions
+        self.trajectory.yaw[frame_slice] = yaw
+        self.trajectory.led[frame_slice] = led
+        self.processed += len(job.frames)
+
+    def _fail(self, job: WorkerJob, reason: str) -> None:
+        self._failures.append((job, reason))
+        self._failed.append(job)
+
+    def _cleanup(self) -> None:
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+
+
+def _read_error(job: WorkerJob, return_code: int) -> str:
+    """Exception raised in the worker, or its exit code with the end of its log"""
+    try:
+        return job.error_path.read_text(errors="replace").strip()
+    except OSError:
+        return f"exited with code {return_code}{_read_log_tail(job.log_path)}"
+
+
+def _read_log_tail(log_path: Path, lines=3) -> str:
+    try:
+        tail = log_path.read_text(errors="replace").strip().splitlines()[-lines:]
+    except OSError:
+        return ""
+    return f": {' '.join(tail)}" if tail else ""
@@ -0,0 +1,205 @@
+"""Binary show file format
+
+The module depends only on NumPy, so it can be copied to a ground station to read show files.
+
+File layout (all numbers are little-endian):
+
+* prefix: magic bytes, format version (uint16), reserved (uint16), header size (uint32)
+* header: UTF-8 JSON object with show metadata and offsets of data sections,
+  padded with spaces to `ALIGNMENT` bytes
+* data sections, each aligned to `ALIGNMENT` bytes and stored drone by drone,
+  so the track of a single drone is contiguous:
+
+  * positions: int32 (N, F, 3), fixed-point with `position_scale` units per meter
+  * yaw: int32 (N, F), fixed-point with `yaw_scale` units per radian
+  * led: uint8 (N, F, 3), RGB color
+"""
+
+import json
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+FILE_EXTENSION = ".dshow"
+MAGIC = b"DRONESHW"
+VERSION = 1
+PREFIX = struct.Struct("<8sHHI")
+ALIGNMENT = 16
+
+# Fixed-point resolution: millimeters and milliradians, same precision as CSV export
+POSITION_SCALE = 1000
+YAW_SCALE = 1000
+
+SECTION_DTYPES = {
+    "positions": np.dtype("<i4"),
+    "yaw": np.dtype("<i4"),
+    "led": np.dtype("u1"),
+}
+
+
+class ShowFileError(RuntimeError):
+    pass
+
+
+@dataclass()
+class ShowFile:
+    """Show file opened for reading, data sections are memory-mapped and read on access"""
+
+    path: Path
+    version: int
+    title: str
+    drones: list[str]
+    fps: float
+    frame_start: int
+    frame_count: int
+    coordinate_system: str
+    position_scale: int
+    yaw_scale: int
+    positions: np.ndarray  # (N, F, 3) int32
+    yaw: np.ndarray  # (N, F) int32
+    led: np.ndarray  # (N, F, 3) uint8
+    drone_index: dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.drone_index = {name: index for index, name in enumerate(self.drones)}
+
+    @property
+    def drone_count(self) -> int:
+        return len(self.drones)
+
+    @property
+    def frames(self) -> np.ndarray:
+        return np.arange(self.frame_start, self.frame_start + self.frame_count, dtype=np.int32)
+
+    def track(
+        self, drone: Union[str, int], frames: Optional[slice] = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Read positions (meters), yaw (radians) and LED colors of a single drone
+
+        :param drone: drone name or index
+        :param frames: slice of frame indices to read, all frames by default
+        """
+        index = self.drone_index[drone] if isinstance(drone, str) else drone
+        frames = frames if frames is not None else slice(None)
+        positions = self.positions[index, frames] / self.position_scale
+        yaw = self.yaw[index, frames] / self.yaw_scale
+        led = np.array(self.led[index, frames])
+        return positions, yaw, led
+
+
+def write_show_file(
+    filepath: Path,
+    title: str,
+    drones: list[str],
+    frames: np.ndarray,
+    positions: np.ndarray,
+    yaw: np.ndarray,
+    led: np.ndarray,
+    fps: float,
+    coordinate_system: str,
+) -> None:
+    """Write show animation to a binary file
+
+    :param frames: frame numbers (F,), consecutive
+    :param positions: drone positions (F, N, 3) in meters
+    :param yaw: drone yaw (F, N) in radians
+    :param led: LED colors (F, N, 3)
+    """
+    frame_count = len(frames)
+    sections = {
+        "positions": _to_fixed_point(positions, POSITION_SCALE).transpose(1, 0, 2),
+        "yaw": _to_fixed_point(yaw, YAW_SCALE).transpose(1, 0),
+        "led": np.asarray(led, dtype=np.uint8).transpose(1, 0, 2),
+    }
+
+    header = {
+        "title": title,
+        "drones": list(drones),
+        "fps": fps,
+        "frame_start": int(frames[0]) if frame_count else 0,
+        "frame_count": frame_count,
+        "coordinate_system": coordinate_system,
+        "position_scale": POSITION_SCALE,
+        "yaw_scale": YAW_SCALE,
+        "sections": dict(),
+    }
+
+    # Offsets depend on header size, so it is laid out until offsets stop changing
+    header_size = 0
+    while True:
+        offset = _align(PREFIX.size + header_size)
+        for name, data in sections.items():
+            header["sections"][name] = {"offset": offset, "shape": list(data.shape)}
+            offset = _align(offset + data.size * SECTION_DTYPES[name].itemsize)
+        encoded = json.dumps(header, ensure_ascii=False).encode()
+        if len(encoded) <= header_size:
+            break
+        header_size = len(encoded)
+    encoded = encoded.ljust(_align(PREFIX.size + header_size) - PREFIX.size, b" ")
+
+    with open(filepath, "wb") as show_file:
+        show_file.write(PREFIX.pack(MAGIC, VERSION, 0, len(encoded)))
+        show_file.write(encoded)
+        for name, data in sections.items():
+            show_file.seek(header["sections"][name]["offset"])
+            show_file.write(np.ascontiguousarray(data, dtype=SECTION_DTYPES[name]).tobytes())
+        show_file.truncate(offset)
+
+
+def read_show_file(filepath: Path) -> ShowFile:
+    """Open show file, data sections are memory-mapped instead of being loaded"""
+    filepath = Path(filepath)
+    with open(filepath, "rb") as show_file:
+        prefix = show_file.read(PREFIX.size)
+        if len(prefix) < PREFIX.size:
+            raise ShowFileError(f"File '{filepath.name}' is not a show file")
+        magic, version, _, header_size = PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise ShowFileError(f"File '{filepath.name}' is not a show file")
+        if version > VERSION:
+            raise ShowFileError(
+                f"Show file version {version} is not supported (latest supported is {VERSION})"
+            )
+        header = json.loads(show_file.read(header_size).decode())
+
+    arrays = dict()
+    for name, dtype in SECTION_DTYPES.items():
+        section = header["sections"][name]
+        shape = tuple(section["shape"])
+        if 0 in shape:
+            arrays[name] = np.zeros(shape, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(
+                filepath, dtype=dtype, mode="r", offset=section["offset"], shape=shape
+            )
+
+    return ShowFile(
+        path=filepath,
+        version=version,
+        title=header["title"],
+        drones=header["drones"],
+        fps=header["fps"],
+        frame_start=header["frame_start"],
+        frame_count=header["frame_count"],
+        coordinate_system=header["coordinate_system"],
+        position_scale=header["position_scale"],
+        yaw_scale=header["yaw_scale"],
+        **arrays,
+    )
+
+
+def _to_fixed_point(values: np.ndarray, scale: int) -> np.ndarray:
+    scaled = np.rint(np.asarray(values, dtype=np.float64) * scale)
+    limits = np.iinfo(np.int32)
+    if not np.isfinite(scaled).all() or (
+        scaled.min(initial=0) < limits.min or scaled.max(initial=0) > limits.max
+    ):
+        raise ShowFileError("Animation values are out of range of the show file format")
+    return scaled.astype(np.int32)
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
@@ -0,0 +1,105 @@
+from typing import Optional
+
+import numpy as np
+
+# Smallest tolerance used for comparisons, so zero tolerance ignores floating point noise
+MIN_TOLERANCE = 1e-6
+
+
+def simplify_track(
+    positions: np.ndarray,
+    yaw: np.ndarray,
+    led: np.ndarray,
+    position_tolerance: float,
+    yaw_tolerance: float,
+    led_tolerance: float,
+) -> np.ndarray:
+    """Find frames to keep so that linear interpolation between them stays within tolerances
+
+    Ramer–Douglas–Peucker simplification with the error measured between the frame value and
+    the value interpolated at the same frame, so timing of the animation is preserved.
+    All segments exceeding tolerance are split at their worst frame at once, so the number
+    of iterations is the depth of the recursion instead of the number of kept frames.
+
+    :param positions: drone positions (F, 3)
+    :param yaw: drone yaw (F,)
+    :param led: LED colors (F, 3)
+    :return: sorted indices of kept frames, always including the first and the last frame
+    """
+    frame_count = len(yaw)
+    positions = positions.astype(np.float64)
+    if frame_count <= 2 or not (np.isfinite(positions).all() and np.isfinite(yaw).all()):
+        return np.arange(frame_count)
+
+    tolerances = (
+        max(position_tolerance, MIN_TOLERANCE),
+        max(yaw_tolerance, MIN_TOLERANCE),
+        max(led_tolerance, MIN_TOLERANCE),
+    )
+    keep = np.zeros(frame_count, dtype=bool)
+    keep[[0, -1]] = True
+    # Frames of segments split on the previous iteration, other segments are within tolerance
+    pending = np.arange(1, frame_count - 1)
+    while len(pending):
+        indices = np.flatnonzero(keep)
+        errors = track_errors(positions, yaw, led, indices, pending)
+        # Error relative to the tolerance of each channel, above 1 breaks the tolerance
+        ratios = np.max(
+            [error / tolerance for error, tolerance in zip(errors, tolerances)], axis=0
+        )
+        segments = np.searchsorted(indices, pending, side="right")
+        exceeding = np.flatnonzero(ratios > 1)
+
+        # Worst frame of every segment
+        order = exceeding[np.lexsort((-ratios[exceeding], segments[exceeding]))]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = np.diff(segments[order]) != 0
+        keep[pending[order[first]]] = True
+
+        split = np.isin(segments, segments[exceeding])
+        pending = pending[split & ~keep[pending]]
+
+    return np.flatnonzero(keep)
+
+
+def track_errors(
+    positions: np.ndarray,
+    yaw: np.ndarray,
+    led: np.ndarray,
+    indices: np.ndarray,
+    frames: Optional[np.ndarray] = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Errors of the track reconstructed from kept frames, on all frames or on given frame indices
+
+    :return: position distance, absolute yaw difference and largest LED component difference
+    """
+    if frames is None:
+        frames = np.arange(len(yaw))
+    starts, ends, factors = _segment_factors(indices, frames)
+
+    def error(values):
+        start_values = values[starts].astype(np.float64)
+        if values.ndim > 1:
+            interpolated = start_values + factors[:, None] * (values[ends] - start_values)
+        else:
+            interpolated = start_values + factors * (values[ends] - start_values)
+        return interpolated - values[frames]
+
+    position_errors = np.linalg.norm(error(positions), axis=1)
+    yaw_errors = np.abs(error(yaw))
+    led_errors = np.abs(error(led)).max(axis=1)
+    return position_errors, yaw_errors, led_errors
+
+
+def _segment_factors(
+    indices: np.ndarray, frames: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Kept frames around each frame and its interpolation factor between them"""
+    if len(indices) < 2:
+        starts = np.full(len(frames), indices[0])
+        return starts, starts, np.zeros(len(frames))
+
+    segments = np.searchsorted(indices, frames, side="right") - 1
+    segments = np.clip(segments, 0, len(indices) - 2)
+    starts, ends = indices[segments], indices[segments + 1]
+    return starts, ends, (frames - starts) / (ends - starts)
@@ -1,24 +1,18 @@
 import itertools
-import math
+import time
 from typing import Any, Iterable, Iterator
 
+import numpy as np
+
 import bpy
 from bpy.types import Object, Operator
 
 from ...helpers import animation
+from ...helpers import cache as cache_helpers
+from ...helpers import collision as collision_helpers
 from ...helpers import drone as drone_helpers
 from ...helpers import led as led_helpers
-
-
-def neighbour_pairs(sequence):
-    iterable = iter(sequence)
-    try:
-        prev = next(iterable)
-    except StopIteration:
-        return ()
-    for item in iterable:
-        yield prev, item
-        prev = item
+from .chunked import ChunkedTask, TaskProgress, format_throughput
 
 
 def compress_warnings_frames(
@@ -44,33 +38,56 @@ def compress_warnings_drones(
         yield key, drones, values
 
 
-def check_speed(
-    frames: list[animation.Frame], limit: float, frame_rate: int
-) -> Iterator[tuple[int, float]]:
-    for previous_frame, frame in neighbour_pairs(frames):
-        distance = math.dist(previous_frame.position, frame.position)
-        speed = distance * frame_rate
-        if speed > limit:
-            yield frame.number, speed
+def check_kinematics(
+    positions: np.ndarray, frames: np.ndarray, frame_rate: int, order: int, limit: float
+) -> list[tuple[tuple[int, int], tuple[int], float]]:
+    """Check magnitude of position derivative of given order (speed, acceleration, jerk) for all drones
+
+    Derivatives are computed with finite differences and attributed to the last frame they use.
+    Returns warnings compressed to frame ranges in the form of `(frame_range, (drone_index,), max_value)`.
+    """
+    values = positions.astype(np.float64)
+    for _ in range(order):
+        values = np.diff(values, axis=0)
+    magnitudes = np.linalg.norm(values, axis=-1).T * frame_rate**order  # (N, F - order)
+
+    drones, indices = np.nonzero(magnitudes > limit)
+    if not len(drones):
+        return []
+
+    frame_numbers = frames[indices + order]
+    breaks = np.flatnonzero((np.diff(drones) != 0) | (np.diff(frame_numbers) != 1)) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [len(drones)])) - 1
+    maximums = np.maximum.reduceat(magnitudes[drones, indices], starts)
+
+    frame_numbers, drones = frame_numbers.tolist(), drones.tolist()
+    return [
+        ((frame_numbers[start], frame_numbers[end]), (drones[start],), maximum)
+        for start, end, maximum in zip(
+            starts.tolist(), ends.tolist(), maximums.tolist()
+        )
+    ]
 
 
 def check_distance_all(
-    drones: dict[Object, list[animation.Frame]], limit: float
-) -> Iterator[tuple[tuple[Object], Iterator[tuple[int, float]]]]:
-    pairs = itertools.combinations(drones.items(), 2)
-    for (drone1, frames1), (drone2, frames2) in pairs:
-        yield (drone1, drone2), check_distance(frames1, frames2, limit)
-        # for frame1, frame2 in zip(frames1, frames2):
-        #     distance = math.dist(frame1.position, frame2.position)
-        #     if distance < limit:
-        #         yield frame1.number, (drone1, drone2), distance
-
-
-def check_distance(frames1, frames2, limit: float) -> Iterator[tuple[int, float]]:
-    for frame1, frame2 in zip(frames1, frames2):
-        distance = math.dist(frame1.position, frame2.position)
-        if distance < limit:
-            yield frame1.number, distance
+    trajectory: animation.ShowTrajectory, limit: float, continuous=False
+) -> Iterator[tuple[tuple[int, int], Iterator[tuple[int, float]]]]:
+    pairs = collision_helpers.find_close_pairs_pruned(trajectory.positions, limit)
+    if continuous:
+        swept_pairs = collision_helpers.find_swept_close_pairs(
+            trajectory.positions, limit
+        )
+        pairs = collision_helpers.merge_pairs(pairs, swept_pairs)
+    frames, drones1, drones2, distances = pairs
+    warnings = zip(
+        drones1.tolist(),
+        drones2.tolist(),
+        trajectory.frames[frames].tolist(),
+        distances.tolist(),
+    )
+    for drones, group in itertools.groupby(warnings, lambda x: x[:2]):
+        yield drones, ((frame, distance) for _, _, frame, distance in group)
 
 
 def format_drones(drone_objs: Iterable[Object]) -> str:
@@ -86,12 +103,26 @@ def format_frame_range(frame_range: tuple[int, int]) -> str:
     return frames
 
 
-class CheckSwarmAnimation(Operator):
+KINEMATICS = (
+    # Property name, derivative order, label, unit
+    ("speed", 1, "Speed", "m/s"),
+    ("acceleration", 2, "Acceleration", "m/s²"),
+    ("jerk", 3, "Jerk", "m/s³"),
+)
+
+
+class CheckSwarmAnimation(Operator, ChunkedTask):
     bl_idname = "drone_show.check"
     bl_label = "Check animation"
     bl_description = "Check drone show animation for errors"
 
+    def invoke(self, context, event):
+        return self.run_modal(context)
+
     def execute(self, context):
+        return self.run_blocking(context)
+
+    def run(self, context) -> TaskProgress:
         drone_show = context.scene.drone_show
         drone_objects = drone_helpers.get_drone_objects(context)
 
@@ -99,51 +130,70 @@ class CheckSwarmAnimation(Operator):
             self.report({"ERROR"}, "No drone objects found")
             return {"CANCELLED"}
 
+        check_kinematics_enabled = any(
+            getattr(drone_show, f"check_{name}") for name, *_ in KINEMATICS
+        )
         if (
             not drone_show.check_led
-            and not drone_show.check_speed
+            and not check_kinematics_enabled
             and not drone_show.check_distance
         ):
             self.report({"ERROR"}, "No checks enabled")
             return {"CANCELLED"}
 
         led_warnings = list()
-        speed_warnings = list()
+        kinematics_warnings = {name: list() for name, *_ in KINEMATICS}
         distance_warnings = list()
 
-        drones = dict()
+        led_materials = dict()
 
         for drone_obj in drone_objects:
             try:
                 led_material = led_helpers.get_led_material(drone_obj)
-                led_helpers.get_material_color(
-                    led_material
-                )  # try getting material color to probe for errors
+                led_helpers.get_led_color(
+                    drone_obj, led_material
+                )  # try getting LED color to probe for errors
             except led_helpers.LedError as e:
                 led_material = None
                 if drone_show.check_led:
                     led_warnings.append((drone_obj, str(e)))
+            led_materials[drone_obj] = led_material
 
-            if drone_show.check_speed or drone_show.check_distance:
-                frames = list(
-                    animation.extract_animation(context.scene, drone_obj, led_material)
-                )
-                drones[drone_obj] = frames
-
-            if drone_show.check_speed:
-                s_warn = check_speed(
-                    frames, drone_show.speed_limit, context.scene.render.fps
-                )
-                s_warn = compress_warnings_frames(s_warn)
-                s_warn = (
-                    (frame_range, (drone_obj,), max(values))
-                    for frame_range, values in s_warn
-                )
-                speed_warnings.extend(s_warn)
+        start_time = time.perf_counter()
+        if check_kinematics_enabled or drone_show.check_distance:
+            extraction = cache_helpers.CachedExtraction(context.scene, led_materials)
+            try:
+                while not extraction.done:
+                    extraction.step()
+                    yield extraction.processed, extraction.total
+            finally:
+                if not extraction.done:
+                    extraction.cancel()
+            trajectory = extraction.result()
+
+        for name, order, _, _ in KINEMATICS:
+            if not getattr(drone_show, f"check_{name}"):
+                continue
+            k_warns = check_kinematics(
+                trajectory.positions,
+                trajectory.frames,
+                context.scene.render.fps,
+                order,
+                getattr(drone_show, f"{name}_limit"),
+            )
+            kinematics_warnings[name].extend(
+                (frame_range, tuple(drone_objects[drone] for drone in drones), value)
+                for frame_range, drones, value in k_warns
+            )
 
         if drone_show.check_distance:
-            d_warns = check_distance_all(drones, drone_show.distance_limit)
-            for drones, warnings in d_warns:
+            d_warns = check_distance_all(
+                trajectory,
+                drone_show.distance_limit,
+                drone_show.continuous_distance,
+            )
+            for (drone1, drone2), warnings in d_warns:
+                drones = (drone_objects[drone1], drone_objects[drone2])
                 warnings = compress_warnings_frames(warnings)
                 d_warn = (
                     (frame_range, drones, min(values))
@@ -153,19 +203,25 @@ class CheckSwarmAnimation(Operator):
 
         no_warnings = True
 
-        max_speed = 0
-        if speed_warnings:
+        max_values = dict()
+        for name, _, label, unit in KINEMATICS:
+            if not kinematics_warnings[name]:
+                continue
             no_warnings = False
-            for frame_range, drones, speeds in compress_warnings_drones(speed_warnings):
-                range_max = max(speeds)
-                max_speed = max(max_speed, range_max)
+            limit = getattr(drone_show, f"{name}_limit")
+            max_values[name] = 0
+            for frame_range, drones, values in compress_warnings_drones(
+                kinematics_warnings[name]
+            ):
+                range_max = max(values)
+                max_values[name] = max(max_values[name], range_max)
 
                 if drone_show.detailed_warnings:
                     self.report(
                         {"WARNING"},
                         f"{format_frame_range(frame_range)}: "
-                        f"Speed exceeds {drone_show.speed_limit:.1f}m/s "
-                        f"(max {range_max:.1f}m/s) {format_drones(drones)}",
+                        f"{label} exceeds {limit:.1f}{unit} "
+                        f"(max {range_max:.1f}{unit}) {format_drones(drones)}",
                     )
 
         min_distance = float("inf")
@@ -196,11 +252,13 @@ class CheckSwarmAnimation(Operator):
 
         # Summary reports
 
-        if max_speed > 0:
-            self.report(
-                {"WARNING"},
-                f"Max speed was exceeded: {max_speed:.1f}m/s (allowed {drone_show.speed_limit:.1f}m/s)",
-            )
+        for name, _, label, unit in KINEMATICS:
+            if name in max_values:
+                limit = getattr(drone_show, f"{name}_limit")
+                self.report(
+                    {"WARNING"},
+                    f"Max {label.lower()} was exceeded: {max_values[name]:.1f}{unit} (allowed {limit:.1f}{unit})",
+                )
 
         if min_distance < float("inf"):
             self.report(
@@ -208,8 +266,11 @@ class CheckSwarmAnimation(Operator):
                 f"Min distance was exceeded: {min_distance:.1f}m (allowed {drone_show.distance_limit:.1f}m)",
             )
 
+        duration = time.perf_counter() - start_time
+        frame_count = context.scene.frame_end - context.scene.frame_start + 1
         self.report(
             {"INFO"},
-            f"Performed checks for {len(drone_objects)} drones ({'no warnings' if no_warnings else 'click for details'})",
+            f"Performed checks for {len(drone_objects)} drones ({'no warnings' if no_warnings else 'click for details'}) "
+            f"in {duration:.1f}s ({format_throughput(frame_count, len(drone_objects), duration)})",
         )
         return {"FINISHED"}
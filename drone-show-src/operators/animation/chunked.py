@@ -0,0 +1,91 @@
+import time
+from typing import Generator
+
+# Task yields (processed, total) after every unit of work and returns operator result
+TaskProgress = Generator[tuple[int, int], None, set[str]]
+
+# Events still handled by Blender while the task runs, so the viewport can be navigated
+NAVIGATION_EVENTS = {
+    "MOUSEMOVE",
+    "INBETWEEN_MOUSEMOVE",
+    "MIDDLEMOUSE",
+    "WHEELUPMOUSE",
+    "WHEELDOWNMOUSE",
+    "TRACKPADPAN",
+    "TRACKPADZOOM",
+    "MOUSEROTATE",
+    "MOUSESMARTZOOM",
+    "NDOF_MOTION",
+}
+
+
+class ChunkedTask:
+    """Operator mixin for long tasks split into small units of work
+
+    Operator implements `run` generator, which can be either run to completion with `run_blocking`
+    or from a timer with `run_modal`, keeping Blender responsive, showing progress and allowing
+    to cancel the task with Esc. Other input except viewport navigation is blocked, so the scene
+    can't be edited while the task runs. Cancelling closes the generator, so cleanup can be done
+    in `finally` blocks of `run`.
+    """
+
+    # Time spent on the task between UI updates in modal mode (seconds)
+    chunk_duration = 0.1
+
+    def run(self, context) -> TaskProgress:
+        raise NotImplementedError
+
+    def run_blocking(self, context) -> set[str]:
+        task = self.run(context)
+        while True:
+            try:
+                next(task)
+            except StopIteration as stop:
+                return stop.value
+
+    def run_modal(self, context) -> set[str]:
+        window_manager = context.window_manager
+        self._task = self.run(context)
+        self._timer = window_manager.event_timer_add(0.01, window=context.window)
+        window_manager.progress_begin(0, 1)
+        window_manager.modal_handler_add(self)
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        if event.type == "ESC":
+            self._task.close()
+            self._stop_modal(context)
+            self.report({"WARNING"}, f"{self.bl_label}: cancelled")
+            return {"CANCELLED"}
+
+        if event.type in NAVIGATION_EVENTS:
+            return {"PASS_THROUGH"}
+        if event.type != "TIMER":
+            return {"RUNNING_MODAL"}
+
+        chunk_start = time.perf_counter()
+        try:
+            while time.perf_counter() - chunk_start < self.chunk_duration:
+                processed, total = next(self._task)
+        except StopIteration as stop:
+            self._stop_modal(context)
+            return stop.value
+        except Exception as e:
+            self._stop_modal(context)
+            self.report({"ERROR"}, f"{self.bl_label}: {e}")
+            return {"CANCELLED"}
+
+        context.window_manager.progress_update(processed / total if total else 1)
+        return {"RUNNING_MODAL"}
+
+    def _stop_modal(self, context) -> None:
+        window_manager = context.window_manager
+        window_manager.event_timer_remove(self._timer)
+        window_manager.progress_end()
+
+
+def format_throughput(frame_count: int, drone_count: int, duration: float) -> str:
+    duration = max(duration, 1e-6)
+    return (
+        f"{frame_count / duration:.0f} frames/s, {drone_count / duration:.0f} drones/s"
+    )
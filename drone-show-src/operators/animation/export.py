@@ -1,30 +1,41 @@
-import csv
+import functools
 import io
+import math
+import time
 from contextlib import redirect_stdout
 from pathlib import Path
+from typing import Optional
+
+import numpy as np
 
 import bpy
 from bpy.types import Operator, Panel
 from bpy_extras.io_utils import ExportHelper
 
 from ...helpers import animation as animation_helpers
+from ...helpers import cache as cache_helpers
 from ...helpers import drone as drone_helpers
+from ...helpers import export as export_helpers
 from ...helpers import led as led_helpers
+from ...helpers import parallel as parallel_helpers
+from ...helpers import show_file as show_file_helpers
+from ...helpers import simplify as simplify_helpers
 from ...ui import draw_check_properties
+from .chunked import ChunkedTask, TaskProgress, format_throughput
 
 __all__ = ("ExportAnimation", "ExportAnimationChecksPanel")
 
 
-class ExportAnimation(Operator, ExportHelper):
+class ExportAnimation(Operator, ExportHelper, ChunkedTask):
     bl_idname = "drone_show.export_animation"
     bl_label = "Export animation"
-    bl_description = "Export drone show animation to CSV files"
+    bl_description = "Export drone show animation to CSV files or a binary show file"
     filename_ext = ""
     use_filter_folder = True
 
     filepath: bpy.props.StringProperty(
         name="File Path",
-        description="Directory path used for exporting CSV files",
+        description="Directory path used for exporting animation files",
         maxlen=1024,
         subtype="DIR_PATH",
         default="",
@@ -45,7 +56,90 @@ class ExportAnimation(Operator, ExportHelper):
         ),
         default="GLOBAL",
     )
-    
+
+    export_format: bpy.props.EnumProperty(
+        name="Format",
+        description="Format of exported animation files",
+        items=(
+            ("CSV", "CSV", "Text CSV file for every drone"),
+            ("BINARY", "Binary", "Single binary show file with animation of all drones"),
+        ),
+        default="CSV",
+    )
+
+    led_format: bpy.props.EnumProperty(
+        name="LED colors",
+        description="How LED colors are exported to CSV files",
+        items=(
+            ("FRAMES", "Every frame", "LED color in every row of the animation file"),
+            (
+                "RUNS",
+                "Color runs",
+                "Separate '<drone>_led.csv' file with first frame, last frame and color "
+                "of every run of the same color, animation file rows have no LED color",
+            ),
+        ),
+        default="FRAMES",
+    )
+
+    reduce_keyframes: bpy.props.BoolProperty(
+        name="Reduce keyframes",
+        description="Export only frames needed to reconstruct the animation "
+        "with linear interpolation within given tolerances (CSV only)",
+        default=False,
+    )
+
+    position_tolerance: bpy.props.FloatProperty(
+        name="Position tolerance",
+        description="Largest allowed position error of the reduced animation",
+        unit="LENGTH",
+        default=0.01,
+        min=0,
+        soft_max=1,
+        precision=3,
+    )
+
+    yaw_tolerance: bpy.props.FloatProperty(
+        name="Yaw tolerance",
+        description="Largest allowed yaw error of the reduced animation",
+        subtype="ANGLE",
+        default=math.radians(1),
+        min=0,
+        soft_max=math.radians(45),
+    )
+
+    led_tolerance: bpy.props.IntProperty(
+        name="LED tolerance",
+        description="Largest allowed error of LED color components of the reduced animation",
+        default=2,
+        min=0,
+        max=255,
+    )
+
+    skip_unchanged: bpy.props.BoolProperty(
+        name="Skip unchanged drones",
+        description="Don't rewrite files of drones whose animation didn't change "
+        "since the previous export to this directory",
+        default=True,
+    )
+
+    parallel_workers: bpy.props.IntProperty(
+        name="Parallel workers",
+        description="Number of background Blender processes extracting animation, "
+        "each process extracts its own range of frames (1 extracts animation in this process)",
+        default=1,
+        min=1,
+        soft_max=64,
+    )
+
+    worker_timeout: bpy.props.FloatProperty(
+        name="Worker timeout",
+        description="Time after which a background process is stopped "
+        "and its frames are extracted in this process (seconds)",
+        default=600,
+        min=1,
+    )
+
     @property
     def local_coordinates(self):
         return self.coordinate_system == "LOCAL"
@@ -59,7 +153,35 @@ class ExportAnimation(Operator, ExportHelper):
         row = column.row()
         row.prop(self, "coordinate_system", expand=True)
 
+        column.label(text="Format:")
+        row = column.row()
+        row.prop(self, "export_format", expand=True)
+
+        column = layout.column()
+        column.enabled = self.export_format == "CSV"
+        column.label(text="LED colors:")
+        row = column.row()
+        row.prop(self, "led_format", expand=True)
+        column.prop(self, "reduce_keyframes")
+        column = column.column()
+        column.active = self.reduce_keyframes
+        column.prop(self, "position_tolerance")
+        column.prop(self, "yaw_tolerance")
+        column.prop(self, "led_tolerance")
+
+        column = layout.column()
+        column.prop(self, "skip_unchanged")
+        column.prop(self, "parallel_workers")
+        row = column.row()
+        row.enabled = self.parallel_workers > 1
+        row.prop(self, "worker_timeout")
+
     def execute(self, context):
+        if self.options.is_invoke:
+            return self.run_modal(context)
+        return self.run_blocking(context)
+
+    def run(self, context) -> TaskProgress:
         base_dir = Path(self.filepath)
         base_dir.mkdir(exist_ok=True)
 
@@ -69,7 +191,44 @@ class ExportAnimation(Operator, ExportHelper):
             self.report({"ERROR"}, "No drone objects found")
             return {"CANCELLED"}
 
+        frame_start = context.scene.frame_start
+        frame_end = context.scene.frame_end
+
+        led_materials = dict()
+        for drone_obj in drone_objects:
+            try:
+                led_material = led_helpers.get_led_material(drone_obj)
+                led_helpers.get_led_color(drone_obj, led_material)  # try getting LED color to probe for errors
+            except led_helpers.LedError as e:
+                led_material = None
+                self.report({"WARNING"}, f"Drone '{drone_obj.name}': {str(e)}")
+            led_materials[drone_obj] = led_material
+
+        start_time = time.perf_counter()
+        if self.parallel_workers > 1:
+            make_extractor = functools.partial(
+                parallel_helpers.ParallelExtractor,
+                workers=self.parallel_workers,
+                timeout=self.worker_timeout,
+            )
+        else:
+            make_extractor = animation_helpers.TrajectoryExtractor
+        extraction = cache_helpers.CachedExtraction(context.scene, led_materials, make_extractor)
+        total = extraction.total + len(drone_objects)
+        try:
+            while not extraction.done:
+                extraction.step()
+                yield extraction.processed, total
+        finally:
+            if not extraction.done:
+                extraction.cancel()
+        trajectory = extraction.result(self.local_coordinates)
+        if isinstance(extraction.extractor, parallel_helpers.ParallelExtractor):
+            for message in extraction.extractor.warnings:
+                self.report({"WARNING"}, message)
+
         if self.perform_checks:
+            # Checks reuse the animation just extracted to the cache
             # This is done because Blender doesn't show reports from operators invoked from the code
             stdout = io.StringIO()
             with redirect_stdout(stdout):
@@ -81,44 +240,149 @@ class ExportAnimation(Operator, ExportHelper):
                 _, message = report.split(": ", 1)
                 self.report({"WARNING"}, message)
 
-        frame_start = context.scene.frame_start
-        frame_end = context.scene.frame_end
+        title = Path(bpy.data.filepath).stem
+        render = context.scene.render
+        parameters = {
+            "format": self.export_format,
+            "coordinate_system": self.coordinate_system,
+            "title": title,
+        }
+        reduce_keyframes = self.reduce_keyframes and self.export_format == "CSV"
+        if reduce_keyframes:
+            parameters["tolerances"] = self.tolerances
+        led_runs = self.led_format == "RUNS" and self.export_format == "CSV"
+        if led_runs:
+            parameters["led_format"] = self.led_format
+        if self.export_format == "BINARY":
+            parameters["fps"] = render.fps / render.fps_base
+            filepath = base_dir / f"{title or 'show'}{show_file_helpers.FILE_EXTENSION}"
+            filepaths = {name: filepath for name in trajectory.drones}
+        else:
+            filepaths = {name: base_dir / f"{name}.csv" for name in trajectory.drones}
+        led_filepaths = {name: base_dir / f"{name}_led.csv" for name in trajectory.drones}
 
-        for drone_num, drone_obj in enumerate(drone_objects):
-            filepath = base_dir / f"{drone_obj.name}.csv"
-            with open(filepath, "w") as csv_file:
-                animation_writer = csv.writer(csv_file, delimiter=",", quotechar="|", quoting=csv.QUOTE_MINIMAL)
-                animation_writer.writerow([Path(bpy.data.filepath).stem])
+        # Drones are compared to the previous export by hashes of their exported data
+        manifest = export_helpers.read_manifest(base_dir) if self.skip_unchanged else dict()
+        hashes = {
+            name: export_helpers.drone_hash(trajectory, drone_num, parameters)
+            for drone_num, name in enumerate(trajectory.drones)
+        }
+        changed = [
+            name
+            for name, digest in hashes.items()
+            if manifest.get(name) != digest
+            or not filepaths[name].exists()
+            or (led_runs and not led_filepaths[name].exists())
+        ]
 
+        if self.export_format == "BINARY":
+            # All drones are stored in one file, so it is rewritten if any drone was added or removed
+            if changed or manifest.keys() != hashes.keys():
                 try:
-                    led_material = led_helpers.get_led_material(drone_obj)
-                    led_helpers.get_material_color(led_material)  # try getting material color to probe for errors
-                except led_helpers.LedError as e:
-                    led_material = None
-                    self.report({"WARNING"}, f"Drone '{drone_obj.name}': {str(e)}")
-
-                frames = animation_helpers.extract_animation(context.scene, drone_obj, led_material, self.local_coordinates)
-                for frame in frames:
-                    animation_writer.writerow(
-                        (
-                            frame.number,
-                            *frame.position_round,
-                            frame.yaw_round,
-                            *frame.led_color_export,
+                    show_file_helpers.write_show_file(
+                        filepath,
+                        title,
+                        trajectory.drones,
+                        trajectory.frames,
+                        trajectory.positions,
+                        trajectory.yaw,
+                        trajectory.led,
+                        fps=parameters["fps"],
+                        coordinate_system=self.coordinate_system,
+                    )
+                except show_file_helpers.ShowFileError as e:
+                    self.report({"ERROR"}, str(e))
+                    return {"CANCELLED"}
+                self.report({"INFO"}, f"Show file exported to '{filepath.name}'")
+            yield total, total
+        else:
+            changed_set = set(changed)
+            exported_rows = 0
+            for drone_num, drone_obj in enumerate(drone_objects):
+                if drone_obj.name in changed_set:
+                    frame_indices = None
+                    if reduce_keyframes:
+                        frame_indices = self.reduce_drone_keyframes(trajectory, drone_num)
+                    exported_rows += (
+                        len(frame_indices) if frame_indices is not None else trajectory.frame_count
+                    )
+                    export_helpers.write_animation_csv(
+                        filepaths[drone_obj.name],
+                        trajectory,
+                        drone_num,
+                        title,
+                        frame_indices,
+                        include_led=not led_runs,
+                    )
+                    if led_runs:
+                        export_helpers.write_led_runs_csv(
+                            led_filepaths[drone_obj.name], trajectory, drone_num, title
                         )
+                    self.report(
+                        {"INFO"},
+                        f"Animation file exported for drone '{drone_obj.name}' ({drone_num}/{len(drone_objects)})",
                     )
+                if not led_runs:
+                    # LED colors are in animation files, so runs files of a previous export are stale
+                    led_filepaths[drone_obj.name].unlink(missing_ok=True)
+                yield extraction.total + drone_num + 1, total
 
-            self.report(
-                {"INFO"},
-                f"Animation file exported for drone '{drone_obj.name}' ({drone_num}/{len(drone_objects)})",
-            )
+            if reduce_keyframes and changed:
+                frame_total = len(changed) * trajectory.frame_count
+                self.report(
+                    {"INFO"},
+                    f"Reduced keyframes: {exported_rows} of {frame_total} frames exported "
+                    f"({exported_rows / max(frame_total, 1):.1%})",
+                )
 
+        export_helpers.write_manifest(base_dir, parameters, hashes)
+        # Without skipping unchanged drones the previous export isn't read and all drones are exported
+        if self.skip_unchanged:
+            if changed:
+                self.report(
+                    {"INFO"},
+                    f"Animation changed for {len(changed)} of {len(hashes)} drones: {', '.join(changed)}",
+                )
+            else:
+                self.report({"INFO"}, "Animation of all drones is unchanged since the previous export")
+
+        duration = time.perf_counter() - start_time
+        frame_count = frame_end - frame_start + 1
         self.report(
             {"INFO"},
-            f"Exported animation for {len(drone_objects)} drones ({frame_end - frame_start + 1} frames)",
+            f"Exported animation for {len(drone_objects)} drones ({frame_count} frames) "
+            f"in {duration:.1f}s ({format_throughput(frame_count, len(drone_objects), duration)})",
         )
         return {"FINISHED"}
 
+    @property
+    def tolerances(self) -> tuple[float, float, float]:
+        # LED colors exported as color runs don't limit reduction of animation rows
+        led_tolerance = math.inf if self.led_format == "RUNS" else self.led_tolerance
+        return self.position_tolerance, self.yaw_tolerance, led_tolerance
+
+    def reduce_drone_keyframes(
+        self, trajectory: animation_helpers.ShowTrajectory, drone_index: int
+    ) -> Optional[np.ndarray]:
+        """Indices of frames to export, verified to reconstruct the animation within tolerances"""
+        track = (
+            trajectory.positions[:, drone_index],
+            trajectory.yaw[:, drone_index],
+            trajectory.led[:, drone_index],
+        )
+        frame_indices = simplify_helpers.simplify_track(*track, *self.tolerances)
+
+        errors = simplify_helpers.track_errors(*track, frame_indices)
+        for error, tolerance, label in zip(errors, self.tolerances, ("position", "yaw", "LED")):
+            if error.max(initial=0) > max(tolerance, simplify_helpers.MIN_TOLERANCE):
+                self.report(
+                    {"WARNING"},
+                    f"Drone '{trajectory.drones[drone_index]}': reduced animation exceeds "
+                    f"{label} tolerance ({error.max():.4f}), exporting all frames",
+                )
+                return None
+        return frame_indices
+
 
 class ExportAnimationChecksPanel(Panel):
     bl_space_type = "FILE_BROWSER"
@@ -93,7 +93,7 @@ class AddAruco(Operator, AddObjectHelper):
         subrow.prop(self, "rim_size", text="Size")
 
     def execute(self, context):
-        mesh = aruco_helpers.get_marker_mesh()
+        mesh = aruco_helpers.get_marker_mesh(add_uv=True)
         aruco_object = object_data_add(context, mesh, operator=self)
         aruco_object.name = f"Aruco {self.marker_id}"
         aruco_object.show_name = True
@@ -122,12 +122,6 @@ class AddAruco(Operator, AddObjectHelper):
             aruco_object.select_set(True)
             bpy.context.view_layer.objects.active = aruco_object
 
-        uv_layer = aruco_object.data.uv_layers.new(name="Aruco")
-        uv_layer.data[0].uv = (0, 0)
-        uv_layer.data[1].uv = (1, 0)
-        uv_layer.data[2].uv = (1, 1)
-        uv_layer.data[3].uv = (0, 1)
-
         aruco_object.aruco.is_aruco = True
         aruco_object.aruco.dictionary = self.dictionary
         aruco_object.aruco.marker_id = self.marker_id
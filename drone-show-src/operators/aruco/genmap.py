@@ -1,3 +1,7 @@
+import time
+
+import numpy as np
+
 import bpy
 from bpy.types import Operator
 from bpy_extras.object_utils import (
@@ -5,7 +9,7 @@ from bpy_extras.object_utils import (
     add_object_align_init,
     object_data_add,
 )
-from mathutils import Euler, Matrix, Vector
+from mathutils import Matrix, Vector
 
 from ...helpers import aruco as aruco_helpers
 
@@ -154,6 +158,13 @@ class GenerateArucoMap(Operator, AddObjectHelper):
         step=1,
     )
 
+    use_atlas: bpy.props.BoolProperty(
+        name="Single atlas material",
+        description="Markers take their images from one texture atlas of all dictionary markers "
+        "and share one material",
+        default=False,
+    )
+
     @classmethod
     def poll(cls, context):
         if not super().poll(context):
@@ -185,6 +196,7 @@ class GenerateArucoMap(Operator, AddObjectHelper):
         layout.prop(self, "first_corner")
         layout.prop(self, "direction")
         layout.prop(self, "origin")
+        layout.prop(self, "use_atlas")
 
         layout.separator()
 
@@ -194,6 +206,7 @@ class GenerateArucoMap(Operator, AddObjectHelper):
         row.prop(self, "rim_size")
 
     def execute(self, context):
+        start_time = time.perf_counter()
         total_x = (self.markers_x - 1) * self.x_gap
         total_y = (self.markers_y - 1) * self.y_gap
 
@@ -235,56 +248,41 @@ class GenerateArucoMap(Operator, AddObjectHelper):
 
         origin = add_object_align_init(context, self)
 
-        for y in range(self.markers_y):
-            for x in range(self.markers_x):
-                if self.first_corner == "BOTTOM_LEFT":
-                    id_offset_x = x
-                    id_offset_y = y
-                elif self.first_corner == "TOP_LEFT":
-                    id_offset_x = x
-                    id_offset_y = self.markers_y - y - 1
-                elif self.first_corner == "BOTTOM_RIGHT":
-                    id_offset_x = self.markers_x - x - 1
-                    id_offset_y = y
-                elif self.first_corner == "TOP_RIGHT":
-                    id_offset_x = self.markers_x - x - 1
-                    id_offset_y = self.markers_y - y - 1
-                else:
-                    id_offset_x = 0
-                    id_offset_y = 0
-
-                if self.direction == "HORIZONTAL":
-                    marker_id = (
-                        self.first_id + id_offset_y * self.markers_x + id_offset_x
-                    )
-                else:
-                    marker_id = (
-                        self.first_id + id_offset_x * self.markers_y + id_offset_y
-                    )
-
-                pos_x = x * self.x_gap + offset_x
-                pos_y = y * self.y_gap + offset_y
-
-                pos = self.location + (Vector((pos_x, pos_y, 0)) @ origin.inverted())
-                rot = self.rotation.copy()
-                rot.rotate_axis("Z", self.z_rotation)
-
-                bpy.ops.drone_show.add_aruco(
-                    align=self.align,
-                    location=pos,
-                    rotation=rot,
-                    size=self.size,
-                    dictionary=self.dictionary,
-                    marker_id=marker_id,
-                    add_rim=self.rim_type == "INDIVIDUAL",
-                    rim_size=self.rim_size,
-                )
-                aruco_object = context.active_object
-                aruco_object.parent = empty_object
-                aruco_object.matrix_parent_inverse = (
-                    empty_object.matrix_world.inverted()
-                )
-                aruco_object.select_set(False)
+        x, y = np.meshgrid(np.arange(self.markers_x), np.arange(self.markers_y))
+        x, y = x.ravel(), y.ravel()
+
+        if self.first_corner in ("TOP_RIGHT", "BOTTOM_RIGHT"):
+            id_offset_x = self.markers_x - x - 1
+        else:
+            id_offset_x = x
+        if self.first_corner in ("TOP_LEFT", "TOP_RIGHT"):
+            id_offset_y = self.markers_y - y - 1
+        else:
+            id_offset_y = y
+
+        if self.direction == "HORIZONTAL":
+            marker_ids = self.first_id + id_offset_y * self.markers_x + id_offset_x
+        else:
+            marker_ids = self.first_id + id_offset_x * self.markers_y + id_offset_y
+
+        positions = np.column_stack(
+            (x * self.x_gap + offset_x, y * self.y_gap + offset_y, np.zeros(len(x)))
+        )
+        rotation = origin.to_3x3()
+        locations = np.array(origin.to_translation()) + positions @ np.array(rotation).T
+        rotation = rotation @ Matrix.Rotation(self.z_rotation, 3, "Z")
+
+        aruco_helpers.add_aruco_objects(
+            context.view_layer.active_layer_collection.collection,
+            self.dictionary,
+            marker_ids,
+            locations,
+            rotation.to_euler(),
+            self.size,
+            rim_size=self.rim_size if self.rim_type == "INDIVIDUAL" else None,
+            parent=empty_object,
+            use_atlas=self.use_atlas,
+        )
 
         if self.rim_type == "MAP":
             mesh = aruco_helpers.get_marker_mesh()
@@ -310,4 +308,8 @@ class GenerateArucoMap(Operator, AddObjectHelper):
         empty_object.select_set(True)
         bpy.context.view_layer.objects.active = empty_object
 
+        duration = time.perf_counter() - start_time
+        self.report(
+            {"INFO"}, f"Generated {len(marker_ids)} Aruco markers in {duration:.2f}s"
+        )
         return {"FINISHED"}
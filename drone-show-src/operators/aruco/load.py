@@ -1,3 +1,4 @@
+import time
 from pathlib import Path
 
 import bpy
@@ -62,6 +63,13 @@ class ImportAruco(Operator, ImportHelper):
         step=1,
     )
 
+    use_atlas: bpy.props.BoolProperty(
+        name="Single atlas material",
+        description="Markers take their images from one texture atlas of all dictionary markers "
+        "and share one material",
+        default=False,
+    )
+
     def draw(self, context):
         layout = self.layout
         layout.use_property_split = True
@@ -69,6 +77,9 @@ class ImportAruco(Operator, ImportHelper):
         row = layout.row()
         row.prop(self, "dictionary")
 
+        row = layout.row()
+        row.prop(self, "use_atlas")
+
         row = layout.row(heading="White rim")
         row.prop(self, "add_rim", text="")
         subrow = row.row()
@@ -76,42 +87,19 @@ class ImportAruco(Operator, ImportHelper):
         subrow.prop(self, "rim_size", text="Size")
 
     def execute(self, context):
+        start_time = time.perf_counter()
         path = Path(self.filepath)
         if not path.exists():
             self.report({"ERROR"}, f"File {path} does not exist")
             return {"CANCELLED"}
 
-        with path.open("r") as f:
-            lines = f.readlines()
-
-        aruco_objects = []
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            if line.startswith("#"):
-                continue
-
-            items = iter(line.split())
-            marker_id = int(next(items))
-            size = float(next(items))
-            x, y, z = (float(next(items, 0)) for _ in range(3))
-            rot_z, rot_y, rot_x = (float(next(items, 0)) for _ in range(3))
-
-            bpy.ops.drone_show.add_aruco(
-                size=size,
-                marker_id=marker_id,
-                dictionary=self.dictionary,
-                location=(x, y, z),
-                rotation=(rot_x, rot_y, rot_z),
-                add_rim=self.add_rim,
-                rim_size=self.rim_size,
-            )
-
-            aruco_objects.append(context.active_object)
-
-        if not aruco_objects:
+        try:
+            marker_ids, sizes, locations, rotations = aruco_helpers.read_aruco_map(path)
+        except ValueError as e:
+            self.report({"ERROR"}, f"Failed to read {path.name}: {str(e)}")
+            return {"CANCELLED"}
+
+        if not len(marker_ids):
             self.report({"WARNING"}, "No Aruco markers found in the file")
             return {"CANCELLED"}
 
@@ -122,13 +110,25 @@ class ImportAruco(Operator, ImportHelper):
 
         empty_object.location = bpy.context.scene.cursor.location
 
-        for aruco_object in aruco_objects:
-            aruco_object.parent = empty_object
-            aruco_object.matrix_parent_inverse = empty_object.matrix_world.inverted()
-
-            aruco_object.select_set(False)
+        aruco_helpers.add_aruco_objects(
+            context.view_layer.active_layer_collection.collection,
+            self.dictionary,
+            marker_ids,
+            locations,
+            rotations,
+            sizes,
+            rim_size=self.rim_size if self.add_rim else None,
+            parent=empty_object,
+            use_atlas=self.use_atlas,
+        )
 
         empty_object.select_set(True)
         context.view_layer.objects.active = empty_object
 
+        duration = time.perf_counter() - start_time
+        self.report(
+            {"INFO"},
+            f"Imported {len(marker_ids)} Aruco markers in {duration:.2f}s "
+            f"({len(marker_ids) / max(duration, 1e-6):.0f} markers/s)",
+        )
         return {"FINISHED"}
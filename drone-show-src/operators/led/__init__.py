@@ -1 +1,3 @@
 from .set_color import *
+from .effects import *
+from .object_color import *
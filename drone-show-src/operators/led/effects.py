@@ -0,0 +1,334 @@
+import time
+
+import numpy as np
+
+import bpy
+from bpy.types import Operator
+
+from ...helpers import animation as animation_helpers
+from ...helpers import drone as drone_helpers
+from ...helpers import led as led_helpers
+from ...helpers import led_effects
+
+__all__ = ("SetLedEffect",)
+
+PROJECTION_AXES = {"XY": (0, 1), "XZ": (0, 2), "YZ": (1, 2)}
+
+
+class SetLedEffect(Operator):
+    bl_idname = "drone_show.set_leds_effect"
+    bl_label = "Set LEDs effect"
+    bl_description = "Set LED animation of the selected drones (or all drones if nothing is selected) from their positions"
+    bl_options = {"REGISTER", "UNDO"}
+
+    effect: bpy.props.EnumProperty(
+        name="Effect",
+        description="Effect to animate LEDs with",
+        items=(
+            ("LINEAR", "Linear sweep", "Effect sweeping along a direction"),
+            ("RADIAL", "Radial sweep", "Effect spreading out of a center"),
+            ("NOISE", "Noise", "Smooth random colors changing in space and time"),
+            ("IMAGE", "Image", "Colors of an image projected onto drones"),
+        ),
+        default="LINEAR",
+    )
+
+    pattern: bpy.props.EnumProperty(
+        name="Pattern",
+        description="Shape of the sweep",
+        items=(
+            ("GRADIENT", "Gradient", "Linear gradient between colors"),
+            ("WAVE", "Wave", "Smooth wave between colors"),
+            ("PULSE", "Pulse", "Narrow band of the second color"),
+        ),
+        default="GRADIENT",
+    )
+
+    palette: bpy.props.EnumProperty(
+        name="Palette",
+        description="Colors of the effect",
+        items=(
+            ("COLORS", "Colors", "Blend between two colors"),
+            ("RAINBOW", "Rainbow", "Rainbow hues"),
+        ),
+        default="COLORS",
+    )
+
+    color_a: bpy.props.FloatVectorProperty(
+        name="First color",
+        subtype="COLOR",
+        size=4,
+        min=0.0,
+        max=1.0,
+        default=(0.0, 0.0, 1.0, 1.0),
+    )
+
+    color_b: bpy.props.FloatVectorProperty(
+        name="Second color",
+        subtype="COLOR",
+        size=4,
+        min=0.0,
+        max=1.0,
+        default=(1.0, 1.0, 1.0, 1.0),
+    )
+
+    direction: bpy.props.FloatVectorProperty(
+        name="Direction",
+        description="Direction of the linear sweep",
+        subtype="DIRECTION",
+        size=3,
+        default=(1.0, 0.0, 0.0),
+    )
+
+    center: bpy.props.FloatVectorProperty(
+        name="Center",
+        description="Center of the radial sweep (3D cursor location by default)",
+        subtype="TRANSLATION",
+        unit="LENGTH",
+        size=3,
+    )
+
+    wavelength: bpy.props.FloatProperty(
+        name="Wavelength",
+        description="Distance between repeats of the sweep",
+        unit="LENGTH",
+        default=10,
+        min=0.01,
+    )
+
+    speed: bpy.props.FloatProperty(
+        name="Speed",
+        description="Number of sweep repeats passing a drone per second",
+        default=0.5,
+    )
+
+    pulse_width: bpy.props.FloatProperty(
+        name="Pulse width",
+        description="Width of the pulse as a fraction of the wavelength",
+        subtype="FACTOR",
+        default=0.2,
+        min=0.01,
+        max=1,
+    )
+
+    noise_scale: bpy.props.FloatProperty(
+        name="Noise scale",
+        description="Size of noise features",
+        unit="LENGTH",
+        default=5,
+        min=0.01,
+    )
+
+    noise_speed: bpy.props.FloatProperty(
+        name="Noise speed",
+        description="Rate of noise change (features per second)",
+        default=1,
+        min=0,
+    )
+
+    seed: bpy.props.IntProperty(
+        name="Seed",
+        description="Seed of the noise",
+        default=0,
+        min=0,
+    )
+
+    image: bpy.props.StringProperty(
+        name="Image",
+        description="Image projected onto drones",
+    )
+
+    projection: bpy.props.EnumProperty(
+        name="Projection",
+        description="Plane the image is projected from, the image is fitted to drone positions",
+        items=(
+            ("XZ", "XZ", "Front projection"),
+            ("YZ", "YZ", "Side projection"),
+            ("XY", "XY", "Top projection"),
+        ),
+        default="XZ",
+    )
+
+    follow_motion: bpy.props.BoolProperty(
+        name="Follow motion",
+        description="Evaluate the effect at drone positions on every keyframe "
+        "instead of their positions on the current frame",
+        default=True,
+    )
+
+    duration: bpy.props.IntProperty(
+        name="Duration",
+        description="Duration of the effect animation",
+        default=200,
+        min=1,
+    )
+
+    frequency: bpy.props.IntProperty(
+        name="Keyframe frequency",
+        description="Frequency of keyframes",
+        default=5,
+        min=1,
+    )
+
+    def invoke(self, context, event):
+        if not self.properties.is_property_set("center"):
+            self.center = context.scene.cursor.location
+        return context.window_manager.invoke_props_dialog(self, width=300)
+
+    def draw(self, context: bpy.types.Context) -> None:
+        layout = self.layout
+        layout.prop(self, "effect")
+
+        if self.effect in ("LINEAR", "RADIAL"):
+            layout.prop(self, "pattern")
+            if self.effect == "LINEAR":
+                layout.prop(self, "direction")
+            else:
+                layout.prop(self, "center")
+            layout.prop(self, "wavelength")
+            layout.prop(self, "speed")
+            if self.pattern == "PULSE":
+                layout.prop(self, "pulse_width")
+        elif self.effect == "NOISE":
+            layout.prop(self, "noise_scale")
+            layout.prop(self, "noise_speed")
+            layout.prop(self, "seed")
+        else:
+            layout.prop_search(self, "image", bpy.data, "images")
+            layout.prop(self, "projection", expand=True)
+
+        if self.effect != "IMAGE":
+            layout.separator()
+            layout.prop(self, "palette", expand=True)
+            if self.palette == "COLORS":
+                row = layout.row()
+                row.prop(self, "color_a", text="")
+                row.prop(self, "color_b", text="")
+
+        layout.separator()
+        layout.prop(self, "follow_motion")
+        layout.prop(self, "duration")
+        layout.prop(self, "frequency")
+
+    def execute(self, context):
+        start_time = time.perf_counter()
+        scene = context.scene
+        drone_objects = drone_helpers.get_drone_objects(
+            context, selected=bool(context.selected_objects)
+        )
+        drone_objects = sorted(drone_objects, key=lambda obj: obj.name)
+
+        if not drone_objects:
+            self.report({"WARNING"}, "No drones selected or available")
+            return {"CANCELLED"}
+
+        pixels = None
+        if self.effect == "IMAGE":
+            image = bpy.data.images.get(self.image)
+            if image is None or 0 in image.size:
+                self.report({"ERROR"}, "Select an image with pixel data")
+                return {"CANCELLED"}
+            channels = image.channels
+            if channels not in (1, 3, 4):
+                self.report({"ERROR"}, f"Images with {channels} channels are not supported")
+                return {"CANCELLED"}
+            width, height = image.size
+            pixels = np.empty(width * height * channels, dtype=np.float32)
+            image.pixels.foreach_get(pixels)
+            pixels = pixels.reshape(height, width, channels)
+            # Grayscale images are broadcast to RGB, images without alpha are opaque
+            if channels == 1:
+                pixels = np.repeat(pixels, 3, axis=-1)
+            if channels < 4:
+                alpha = np.ones((height, width, 1), dtype=np.float32)
+                pixels = np.concatenate((pixels, alpha), axis=-1)
+
+        led_materials = dict()
+        for drone_obj in drone_objects:
+            try:
+                led_materials[drone_obj] = led_helpers.get_led_material(drone_obj)
+            except led_helpers.LedError as e:
+                self.report({"WARNING"}, f"Drone '{drone_obj.name}': {str(e)}")
+
+        start_frame = scene.frame_current
+        frames = np.arange(start_frame, start_frame + self.duration + self.frequency, self.frequency)
+        times = (frames - start_frame) / (scene.render.fps / scene.render.fps_base)
+        positions = self.get_positions(scene, list(led_materials), frames)
+        colors = self.evaluate(positions, times, pixels)
+
+        for drone_index, (drone_obj, led_material) in enumerate(led_materials.items()):
+            led_helpers.set_led_color_keyframes(
+                drone_obj, led_material, frames, colors[:, drone_index]
+            )
+
+        duration = time.perf_counter() - start_time
+        self.report(
+            {"INFO"},
+            f"Set LED effect to {len(led_materials)} drones ({len(frames)} keyframes) "
+            f"in {duration:.2f}s",
+        )
+        return {"FINISHED"}
+
+    def get_positions(self, scene, drone_objects, frames: np.ndarray) -> np.ndarray:
+        """Drone positions (F, N, 3) on the given frames"""
+        if not self.follow_motion:
+            positions = np.array(
+                [drone_obj.matrix_world.to_translation() for drone_obj in drone_objects],
+                dtype=np.float64,
+            ).reshape(-1, 3)
+            return np.broadcast_to(positions, (len(frames), *positions.shape))
+
+        # Only keyframes in the scene frame range are extracted,
+        # keyframes outside of it use the closest extracted keyframe
+        inside = frames[(frames >= scene.frame_start) & (frames <= scene.frame_end)]
+        if len(inside):
+            extracted_frames = range(int(inside[0]), int(inside[-1]) + 1, self.frequency)
+        else:
+            frame = int(np.clip(frames[0], scene.frame_start, scene.frame_end))
+            extracted_frames = range(frame, frame + 1)
+
+        extractor = animation_helpers.TrajectoryExtractor(
+            scene, {drone_obj: None for drone_obj in drone_objects}, extracted_frames
+        )
+        while not extractor.done:
+            extractor.step()
+
+        indices = np.clip(
+            (frames - extracted_frames.start) // extracted_frames.step,
+            0,
+            len(extracted_frames) - 1,
+        )
+        return extractor.trajectory.positions[indices].astype(np.float64)
+
+    def evaluate(self, positions: np.ndarray, times: np.ndarray, pixels=None) -> np.ndarray:
+        """Colors (F, N, 4) of the effect, `pixels` are RGBA pixels (H, W, 4) of the image effect"""
+        if self.effect == "IMAGE":
+            return led_effects.project_image(positions, pixels, PROJECTION_AXES[self.projection])
+
+        if self.effect == "NOISE":
+            values = led_effects.noise(
+                positions, times, self.noise_scale, self.noise_speed, self.seed
+            )
+        else:
+            if self.effect == "LINEAR":
+                phase = led_effects.linear_phase(
+                    positions, times, self.direction, self.wavelength, self.speed
+                )
+            else:
+                phase = led_effects.radial_phase(
+                    positions, times, self.center, self.wavelength, self.speed
+                )
+
+            if self.palette == "RAINBOW" and self.pattern == "GRADIENT":
+                # Hue goes around the color wheel, so the phase is used without mirroring
+                return led_effects.rainbow(phase)
+            if self.pattern == "GRADIENT":
+                values = led_effects.gradient(phase)
+            elif self.pattern == "WAVE":
+                values = led_effects.wave(phase)
+            else:
+                values = led_effects.pulse(phase, self.pulse_width)
+
+        if self.palette == "RAINBOW":
+            return led_effects.rainbow(values)
+        return led_effects.blend(values, self.color_a, self.color_b)
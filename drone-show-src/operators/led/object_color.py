@@ -0,0 +1,39 @@
+from bpy.types import Operator
+
+from ...helpers import drone as drone_helpers
+from ...helpers import led as led_helpers
+
+__all__ = ("UseObjectColorLeds",)
+
+
+class UseObjectColorLeds(Operator):
+    bl_idname = "drone_show.use_object_color_leds"
+    bl_label = "Use object color LEDs"
+    bl_description = (
+        "Move LED colors and their animation of the selected drones (or all drones if nothing is selected) "
+        "to object colors and replace their LED materials with one shared material"
+    )
+    bl_options = {"REGISTER", "UNDO"}
+
+    def execute(self, context):
+        drone_objects = drone_helpers.get_drone_objects(
+            context, selected=bool(context.selected_objects)
+        )
+        if not drone_objects:
+            self.report({"WARNING"}, "No drones selected or available")
+            return {"CANCELLED"}
+
+        count = 0
+        for drone_obj in drone_objects:
+            try:
+                led_material = led_helpers.get_led_material(drone_obj)
+                if led_material.led.use_object_color:
+                    continue
+                led_helpers.use_object_color(drone_obj, led_material)
+            except led_helpers.LedError as e:
+                self.report({"WARNING"}, f"Drone '{drone_obj.name}': {str(e)}")
+                continue
+            count += 1
+
+        self.report({"INFO"}, f"Moved LED color to object color for {count} drones")
+        return {"FINISHED"}
@@ -1,6 +1,7 @@
+import numpy as np
+
 import bpy
 from bpy.types import Operator
-from mathutils import Color
 
 from ...helpers import drone as drone_helpers
 from ...helpers import led as led_helpers
@@ -12,6 +13,7 @@ class SetLedColor(Operator):
     bl_idname = "drone_show.set_leds"
     bl_label = "Set LEDs color"
     bl_description = "Set color of LED material of the selected drones (or all drones if nothing is selected)"
+    bl_options = {"REGISTER", "UNDO"}
 
     def execute(self, context):
         drone_show = context.scene.drone_show
@@ -30,8 +32,8 @@ class SetLedColor(Operator):
                 self.report({"WARNING"}, f"Drone '{drone_obj.name}': {str(e)}")
                 continue
             else:
-                led_helpers.set_material_color(
-                    led_material, drone_show.led_color, context.scene.frame_current
+                led_helpers.set_led_color_keyframes(
+                    drone_obj, led_material, [context.scene.frame_current], [drone_show.led_color]
                 )
                 count += 1
 
@@ -43,6 +45,7 @@ class SetLedRainbow(Operator):
     bl_idname = "drone_show.set_leds_rainbow"
     bl_label = "Set LEDs rainbow"
     bl_description = "Set rainbow animation of LED material of the selected drones (or all drones if nothing is selected)"
+    bl_options = {"REGISTER", "UNDO"}
 
     staggered: bpy.props.BoolProperty(
         name="Staggered",
@@ -98,6 +101,9 @@ class SetLedRainbow(Operator):
 
         count = 0
         start_frame = context.scene.frame_current
+        frames = np.arange(
+            start_frame, start_frame + self.duration + self.frequency, self.frequency
+        )
 
         for drone_obj in drone_objects:
             try:
@@ -106,22 +112,11 @@ class SetLedRainbow(Operator):
                 self.report({"WARNING"}, f"Drone '{drone_obj.name}': {str(e)}")
                 continue
             else:
-                frame_range = range(
-                    start_frame,
-                    start_frame + self.duration + self.frequency,
-                    self.frequency
+                hue_stagger = count / len(drone_objects) if self.staggered else 0
+                hues = (frames - start_frame) / self.duration + hue_stagger + self.stagger_offset
+                led_helpers.set_led_color_keyframes(
+                    drone_obj, led_material, frames, led_helpers.hue_to_rgba(hues % 1)
                 )
-                for frame_number in frame_range:
-                    hue_stagger = count / len(drone_objects) if self.staggered else 0
-                    hue = (frame_number - start_frame) / self.duration + hue_stagger + self.stagger_offset
-
-                    color = Color()
-                    color.hsv = (hue % 1, 1, 1)
-                    rgb = (color.r, color.g, color.b, 1)
-
-                    led_helpers.set_material_color(
-                        led_material, rgb, frame_number
-                    )
                 count += 1
 
         self.report({"INFO"}, f"Set LED rainbow to {count} drones")
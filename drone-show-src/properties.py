@@ -31,6 +31,41 @@ class DroneShowProperties(PropertyGroup):
         step=50,
     )
 
+    check_acceleration: bpy.props.BoolProperty(
+        name="Check acceleration",
+        description="Check maximum drone acceleration",
+        default=False,
+        options=set(),
+    )
+
+    acceleration_limit: bpy.props.FloatProperty(
+        name="Acceleration limit",
+        description="Limit of maximum drone acceleration (m/s²)",
+        unit="ACCELERATION",
+        default=2,
+        min=0,
+        soft_min=0.5,
+        soft_max=20,
+        step=50,
+    )
+
+    check_jerk: bpy.props.BoolProperty(
+        name="Check jerk",
+        description="Check maximum rate of drone acceleration change",
+        default=False,
+        options=set(),
+    )
+
+    jerk_limit: bpy.props.FloatProperty(
+        name="Jerk limit",
+        description="Limit of maximum rate of drone acceleration change (m/s³)",
+        default=10,
+        min=0,
+        soft_min=1,
+        soft_max=100,
+        step=100,
+    )
+
     check_distance: bpy.props.BoolProperty(
         name="Check distance",
         description="Check distance between drones",
@@ -49,6 +84,13 @@ class DroneShowProperties(PropertyGroup):
         step=50,
     )
 
+    continuous_distance: bpy.props.BoolProperty(
+        name="Check between frames",
+        description="Also check closest approach of drones moving between frames",
+        default=False,
+        options=set(),
+    )
+
     detailed_warnings: bpy.props.BoolProperty(
         name="Show detailed warnings",
         description="Show detailed animation check warnings",
@@ -83,6 +125,14 @@ class DroneLedProperties(PropertyGroup):
         options=set(),
     )
 
+    use_object_color: bpy.props.BoolProperty(
+        name="Use object color",
+        description="LED color is taken from the color of each drone object, "
+        "so one material can be shared by all drones",
+        default=False,
+        options=set(),
+    )
+
 
 class ArucoObjectProperties(PropertyGroup):
     def aruco_updated(self, context):
@@ -121,3 +171,12 @@ class ArucoObjectProperties(PropertyGroup):
         update=aruco_updated,
         options=set(),
     )
+
+    use_atlas: bpy.props.BoolProperty(
+        name="Use atlas",
+        description="Marker image is taken from the atlas of all dictionary markers, "
+        "so one material is shared by all markers of the dictionary",
+        default=False,
+        update=aruco_updated,
+        options=set(),
+    )
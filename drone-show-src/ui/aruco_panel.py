@@ -25,6 +25,7 @@ class ArucoPanel(Panel):
 
         layout.prop(aruco, "dictionary")
         layout.prop(aruco, "marker_id")
+        layout.prop(aruco, "use_atlas")
 
 
 class ArucoCoordsPanel(Panel):
@@ -21,8 +21,24 @@ def draw_check_properties(drone_show, layout):
     subrow.enabled = drone_show.check_speed
     subrow.prop(drone_show, "speed_limit")
 
+    row = layout.row()
+    row.prop(drone_show, "check_acceleration", text="")
+    subrow = row.row()
+    subrow.enabled = drone_show.check_acceleration
+    subrow.prop(drone_show, "acceleration_limit")
+
+    row = layout.row()
+    row.prop(drone_show, "check_jerk", text="")
+    subrow = row.row()
+    subrow.enabled = drone_show.check_jerk
+    subrow.prop(drone_show, "jerk_limit")
+
     row = layout.row()
     row.prop(drone_show, "check_distance", text="")
     subrow = row.row()
     subrow.enabled = drone_show.check_distance
     subrow.prop(drone_show, "distance_limit")
+
+    row = layout.row()
+    row.enabled = drone_show.check_distance
+    row.prop(drone_show, "continuous_distance")
@@ -73,7 +73,7 @@ class DroneLedPanel(Panel):
 
         try:
             led_material = led_helpers.get_led_material(context.object)
-            r, g, b = led_helpers.get_material_color(led_material)
+            r, g, b = led_helpers.get_led_color(context.object, led_material)
         except led_helpers.LedError as e:
             row.label(text=str(e), icon="ERROR")
         else:
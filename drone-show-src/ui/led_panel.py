@@ -32,8 +32,11 @@ class LedPanel(Panel):
             row.label(text="Not a designated LED material")
             return
 
+        layout.prop(context.material.led, "use_object_color")
+
+        row = layout.row()
         try:
-            r, g, b = led_helpers.get_material_color(context.material)
+            r, g, b = led_helpers.get_led_color(context.object, context.material)
         except led_helpers.LedError as e:
             row.label(text=str(e), icon="ERROR")
         else:
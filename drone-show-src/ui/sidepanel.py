@@ -37,6 +37,10 @@ class LedOperatorsPanel(Panel):
 
         col = layout.column(align=True)
         col.operator("drone_show.set_leds_rainbow")
+        col.operator("drone_show.set_leds_effect")
+
+        col = layout.column(align=True)
+        col.operator("drone_show.use_object_color_leds")
 
 
 class AnimationPanel(Panel):
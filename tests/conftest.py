@@ -0,0 +1,160 @@
+"""Fixtures for tests run with Blender as a Python module (`pip install bpy`)
+
+Tests are skipped if `bpy` is not available. Tests starting export workers also need
+Blender executable, taken from `BLENDER_BIN` environment variable or `PATH`.
+Helper modules depending only on NumPy are tested without Blender.
+"""
+
+import importlib
+import importlib.util
+import os
+import shutil
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+REPO_PATH = Path(__file__).parents[1]
+PACKAGE = "drone-show-src"
+
+FRAME_START = 1
+FRAME_END = 48
+KEYFRAME_STEP = 8
+
+STANDALONE_HELPERS = ("collision", "export", "show_file")
+
+
+@pytest.fixture(scope="session")
+def standalone():
+    """Helper modules depending only on NumPy, loaded without importing the add-on package"""
+    modules = dict()
+    for name in STANDALONE_HELPERS:
+        spec = importlib.util.spec_from_file_location(
+            name, REPO_PATH / PACKAGE / "helpers" / f"{name}.py"
+        )
+        modules[name] = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modules[name])
+    return SimpleNamespace(**modules)
+
+
+@pytest.fixture()
+def addon():
+    """Add-on package registered in an empty file"""
+    bpy = pytest.importorskip("bpy")
+    if str(REPO_PATH) not in sys.path:
+        sys.path.insert(0, str(REPO_PATH))
+
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    addon = importlib.import_module(PACKAGE)
+    addon.register()
+    yield addon
+    addon.unregister()
+
+
+@pytest.fixture()
+def helpers(addon):
+    """Helper modules of the add-on"""
+    return SimpleNamespace(
+        **{
+            name: importlib.import_module(f"{PACKAGE}.helpers.{name}")
+            for name in ("animation", "export", "led", "parallel")
+        }
+    )
+
+
+@pytest.fixture()
+def show(helpers):
+    """Animated scene with drones sampled from F-curves and drones requiring evaluation
+
+    :return: scene, drones with their LED materials and names of drones requiring evaluation
+    """
+    import bpy
+
+    scene = bpy.context.scene
+    scene.frame_start = FRAME_START
+    scene.frame_end = FRAME_END
+    rng = np.random.default_rng(0)
+    drones = dict()
+
+    for index in range(3):
+        drone_obj, led_material = _add_drone(
+            scene, f"Drone {index}", _add_led_material(f"LED {index}")
+        )
+        drones[drone_obj] = led_material
+    drone_obj.rotation_mode = "ZXY"
+
+    drone_obj, led_material = _add_drone(
+        scene, "Drone object color", helpers.led.get_object_color_material()
+    )
+    drones[drone_obj] = led_material
+
+    parent = bpy.data.objects.new("Parent", None)
+    scene.collection.objects.link(parent)
+    drone_obj, led_material = _add_drone(scene, "Drone parent", _add_led_material("LED parent"))
+    drone_obj.parent = parent
+    drones[drone_obj] = led_material
+
+    drone_obj, led_material = _add_drone(
+        scene, "Drone constraint", _add_led_material("LED constraint")
+    )
+    constraint = drone_obj.constraints.new("LIMIT_LOCATION")
+    constraint.use_max_z = True
+    constraint.max_z = 0
+    drones[drone_obj] = led_material
+
+    for frame in range(FRAME_START, FRAME_END + 1, KEYFRAME_STEP):
+        parent.location = rng.uniform(-5, 5, 3)
+        parent.keyframe_insert("location", frame=frame)
+        for drone_obj, led_material in drones.items():
+            _set_keyframe(helpers, drone_obj, led_material, frame, rng)
+
+    return scene, drones, {"Drone parent", "Drone constraint"}
+
+
+@pytest.fixture()
+def blender_binary(addon):
+    """Blender executable used to start export workers"""
+    import bpy
+
+    if not bpy.app.binary_path:
+        binary = os.environ.get("BLENDER_BIN") or shutil.which("blender")
+        if binary is None:
+            pytest.skip("Blender executable is required to start export workers")
+        bpy.app.binary_path = binary
+    return bpy.app.binary_path
+
+
+def _add_led_material(name: str):
+    import bpy
+
+    material = bpy.data.materials.new(name)
+    material.use_nodes = True
+    material.led.is_led = True
+    return material
+
+
+def _add_drone(scene, name: str, led_material):
+    import bpy
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.materials.append(led_material)
+    drone_obj = bpy.data.objects.new(name, mesh)
+    drone_obj.drone.is_drone = True
+    scene.collection.objects.link(drone_obj)
+    return drone_obj, led_material
+
+
+def _set_keyframe(helpers, drone_obj, led_material, frame: int, rng) -> None:
+    drone_obj.location = rng.uniform(-10, 10, 3)
+    drone_obj.rotation_euler = rng.uniform(-np.pi, np.pi, 3)
+    drone_obj.keyframe_insert("location", frame=frame)
+    drone_obj.keyframe_insert("rotation_euler", frame=frame)
+
+    color = (*rng.uniform(0, 1, 3), 1)
+    if led_material.led.use_object_color:
+        drone_obj.color = color
+        drone_obj.keyframe_insert("color", frame=frame)
+    else:
+        helpers.led.set_material_color(led_material, color, keyframe=frame)
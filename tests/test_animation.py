@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("bpy")
+
+
+def test_fcurve_sampling_matches_frame_set(helpers, show, monkeypatch):
+    """Sampling drones from F-curves gives the same animation as stepping the timeline"""
+    scene, drones, evaluated_names = show
+    animation_helpers = helpers.animation
+
+    sampled_names = {
+        drone_obj.name
+        for drone_obj, led_material in drones.items()
+        if animation_helpers.supports_fcurve_sampling(scene, drone_obj, led_material)
+    }
+    assert sampled_names == {drone_obj.name for drone_obj in drones} - evaluated_names
+
+    sampled = animation_helpers.extract_trajectory(scene, drones)
+    monkeypatch.setattr(animation_helpers, "supports_fcurve_sampling", lambda *args: False)
+    evaluated = animation_helpers.extract_trajectory(scene, drones)
+
+    for drone_index in range(len(drones)):
+        assert helpers.export.format_animation_rows(
+            sampled, drone_index
+        ) == helpers.export.format_animation_rows(evaluated, drone_index)
+    np.testing.assert_array_equal(sampled.led, evaluated.led)
+    assert sampled.led.any()
+
+
+@pytest.mark.parametrize("order", ["XYZ", "XZY", "YXZ", "YZX", "ZXY", "ZYX"])
+def test_euler_to_yaw_matches_mathutils(helpers, order):
+    """Vectorized yaw chooses the same Euler solution as Blender, including gimbal lock"""
+    from mathutils import Euler
+
+    rng = np.random.default_rng(0)
+    rotations = rng.uniform(-np.pi, np.pi, (3000, 3)).astype(np.float32)
+    rotations[:1000, 2] = np.float32(np.pi) * rng.choice((-1, 1), 1000)
+    rotations[1000:2000, 1] = np.pi / 2 - rng.uniform(0, 1e-4, 1000)
+
+    yaw = helpers.animation._euler_to_yaw(rotations, order)
+    expected = [
+        Euler(rotation, order).to_matrix().to_euler("XYZ")[2] for rotation in rotations.tolist()
+    ]
+    # Last bit may differ between NumPy and C library arctangent
+    np.testing.assert_allclose(yaw, expected, rtol=0, atol=1e-6)
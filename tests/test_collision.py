@@ -0,0 +1,124 @@
+import itertools
+
+import numpy as np
+import pytest
+
+
+def random_positions(seed: int, frame_count: int = 30, drone_count: int = 25) -> np.ndarray:
+    """Random walks of drones, some of them jumping far on a single frame"""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, rng.uniform(0.05, 1), (frame_count, drone_count, 3))
+    positions = np.cumsum(steps, axis=0) + rng.uniform(0, 8, (1, drone_count, 3))
+    jumps = rng.integers(0, drone_count, 2)
+    positions[frame_count // 2 :, jumps] += 500
+    # Drones in the same place and drones on the same spot on consecutive frames
+    positions[:, 1] = positions[:, 0]
+    positions[frame_count // 3, 2] = positions[frame_count // 3 - 1, 2]
+    # Drones swapping places pass through each other between frames
+    swap = frame_count // 4
+    positions[swap + 1, [3, 4]] = positions[swap, [4, 3]]
+    return positions.astype(np.float32)
+
+
+def brute_force_pairs(positions: np.ndarray, limit: float):
+    """Pairwise distance check of every frame"""
+    points = positions.astype(np.float64)
+    results = []
+    for drone1, drone2 in itertools.combinations(range(positions.shape[1]), 2):
+        for frame in range(positions.shape[0]):
+            distance = np.linalg.norm(points[frame, drone1] - points[frame, drone2])
+            if distance < limit:
+                results.append((frame, drone1, drone2, distance))
+    return results
+
+
+def brute_force_swept_pairs(positions: np.ndarray, limit: float):
+    """Closest approach of every pair between every two consecutive frames"""
+    points = positions.astype(np.float64)
+    results = []
+    for drone1, drone2 in itertools.combinations(range(positions.shape[1]), 2):
+        for frame in range(1, positions.shape[0]):
+            start = points[frame - 1, drone1] - points[frame - 1, drone2]
+            motion = points[frame, drone1] - points[frame, drone2] - start
+            motion_squared = motion @ motion
+            time = -(start @ motion) / motion_squared if motion_squared > 0 else 0
+            distance = np.linalg.norm(start + time * motion)
+            if distance < limit and 0 < time < 1:
+                results.append((frame, drone1, drone2, distance))
+    return results
+
+
+def assert_pairs_equal(pairs, expected):
+    frames, drones1, drones2, distances = pairs
+    assert list(zip(drones1.tolist(), drones2.tolist(), frames.tolist())) == [
+        (drone1, drone2, frame) for frame, drone1, drone2, _ in expected
+    ]
+    np.testing.assert_allclose(distances, [distance for *_, distance in expected], atol=1e-9)
+
+
+LIMITS = [0.3, 1.5, 4.0]
+
+
+@pytest.mark.parametrize("limit", LIMITS)
+@pytest.mark.parametrize("seed", range(4))
+def test_close_pairs_match_brute_force(standalone, seed, limit):
+    positions = random_positions(seed)
+    expected = brute_force_pairs(positions, limit)
+    assert expected
+
+    assert_pairs_equal(standalone.collision.find_close_pairs(positions, limit), expected)
+    assert_pairs_equal(standalone.collision.find_close_pairs_pruned(positions, limit), expected)
+
+
+@pytest.mark.parametrize("limit", LIMITS)
+@pytest.mark.parametrize("seed", range(4))
+def test_swept_pairs_match_brute_force(standalone, seed, limit):
+    positions = random_positions(seed)
+    expected = brute_force_swept_pairs(positions, limit)
+    assert expected
+
+    assert_pairs_equal(standalone.collision.find_swept_close_pairs(positions, limit), expected)
+
+
+def test_chunks_match_brute_force(standalone, monkeypatch):
+    """Animations longer than a chunk give the same pairs as a single chunk"""
+    positions = random_positions(0)
+    monkeypatch.setattr(standalone.collision, "CHUNK_POINTS", 100)
+
+    assert_pairs_equal(
+        standalone.collision.find_close_pairs(positions, 1.5), brute_force_pairs(positions, 1.5)
+    )
+    assert_pairs_equal(
+        standalone.collision.find_swept_close_pairs(positions, 1.5),
+        brute_force_swept_pairs(positions, 1.5),
+    )
+
+
+def test_merged_pairs_keep_smallest_distance(standalone):
+    positions = random_positions(1)
+    collision = standalone.collision
+
+    merged = collision.merge_pairs(
+        collision.find_close_pairs(positions, 1.5),
+        collision.find_swept_close_pairs(positions, 1.5),
+    )
+
+    best = dict()
+    expected = brute_force_pairs(positions, 1.5) + brute_force_swept_pairs(positions, 1.5)
+    for frame, drone1, drone2, distance in expected:
+        key = (drone1, drone2, frame)
+        best[key] = min(distance, best.get(key, np.inf))
+    expected = [(frame, *drones, best[(*drones, frame)]) for *drones, frame in sorted(best)]
+    assert_pairs_equal(merged, expected)
+
+
+@pytest.mark.parametrize("shape", [(0, 5, 3), (1, 5, 3), (10, 0, 3), (10, 1, 3)])
+def test_degenerate_shapes(standalone, shape):
+    positions = np.zeros(shape, dtype=np.float32)
+    collision = standalone.collision
+
+    swept_frames, *_ = collision.find_swept_close_pairs(positions, 1.5)
+    assert len(swept_frames) == 0
+    if shape[1] < 2:
+        assert len(collision.find_close_pairs(positions, 1.5)[0]) == 0
+        assert len(collision.find_close_pairs_pruned(positions, 1.5)[0]) == 0
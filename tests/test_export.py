@@ -0,0 +1,96 @@
+import csv
+import io
+from dataclasses import dataclass
+
+import numpy as np
+import pytest
+
+
+@dataclass()
+class Trajectory:
+    """Arrays of `ShowTrajectory` used by the export helpers"""
+
+    frames: np.ndarray
+    positions: np.ndarray
+    yaw: np.ndarray
+    led: np.ndarray
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.frames)
+
+    def export_rows(self, drone_index: int):
+        for number, position, yaw, led_color in zip(
+            self.frames.tolist(),
+            self.positions[:, drone_index].tolist(),
+            self.yaw[:, drone_index].tolist(),
+            self.led[:, drone_index].tolist(),
+        ):
+            yield (number, *(round(coord, 3) for coord in position), round(yaw, 3), *led_color)
+
+
+def random_trajectory(frame_count: int, seed: int = 0) -> Trajectory:
+    """Trajectory of one drone including rounding ties, negative zero and large values"""
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(-200, 200, (frame_count, 1, 3))
+    # Exact ties and values that round to negative zero or to whole numbers
+    positions[::7] = np.round(positions[::7] * 2000) / 2000
+    positions[1::7] = rng.choice((-0.0004, -0.0, 0.0005, 0.0015, 2.9995, -7.0), (1, 3))
+    positions[2::7] *= 1e5
+    yaw = rng.uniform(-np.pi, np.pi, (frame_count, 1))
+    yaw[3::7] = rng.choice((-np.pi, np.pi, -0.0, 0.0625), (1,))
+    return Trajectory(
+        # Frame numbers with more than 4 digits are formatted in groups
+        frames=np.arange(frame_count, dtype=np.int32) * 3 - 5,
+        positions=positions.astype(np.float32),
+        yaw=yaw,
+        led=rng.integers(0, 256, (frame_count, 1, 3), dtype=np.uint8),
+    )
+
+
+def reference_rows(rows) -> str:
+    output = io.StringIO()
+    csv.writer(output).writerows(rows)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("include_led", [True, False])
+@pytest.mark.parametrize("seed", range(5))
+def test_animation_rows_match_csv_writer(standalone, seed, include_led):
+    trajectory = random_trajectory(5000, seed)
+    frame_indices = np.sort(np.random.default_rng(seed).choice(5000, 1000, replace=False))
+    row_length = 8 if include_led else 5
+
+    rows = list(trajectory.export_rows(0))
+    assert standalone.export.format_animation_rows(
+        trajectory, 0, include_led=include_led
+    ) == reference_rows(row[:row_length] for row in rows)
+    assert standalone.export.format_animation_rows(
+        trajectory, 0, frame_indices, include_led
+    ) == reference_rows(rows[index][:row_length] for index in frame_indices)
+
+
+@pytest.mark.parametrize("value", [np.nan, np.inf, 2e9])
+def test_animation_rows_fall_back_to_csv_writer(standalone, value):
+    trajectory = random_trajectory(100)
+    trajectory.positions[50, 0, 1] = value
+
+    assert standalone.export.format_animation_rows(trajectory, 0) == reference_rows(
+        trajectory.export_rows(0)
+    )
+
+
+def test_led_runs_csv(standalone, tmp_path):
+    trajectory = random_trajectory(100)
+    trajectory.led[:, 0] = np.repeat(trajectory.led[::10, 0], 10, axis=0)
+    filepath = tmp_path / "drone_led.csv"
+
+    standalone.export.write_led_runs_csv(filepath, trajectory, 0, "show")
+
+    with open(filepath, newline="") as csv_file:
+        rows = list(csv.reader(csv_file))
+    assert rows[0] == ["show"]
+    assert rows[1:] == [
+        [str(start * 3 - 5), str(start * 3 + 22), *map(str, trajectory.led[start, 0])]
+        for start in range(0, 100, 10)
+    ]
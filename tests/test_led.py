@@ -0,0 +1,15 @@
+import pytest
+
+pytest.importorskip("bpy")
+
+
+def test_object_color_material_is_reused(helpers):
+    import bpy
+
+    # Material with the same name which is not an LED material
+    bpy.data.materials.new(helpers.led.OBJECT_COLOR_MATERIAL)
+
+    material = helpers.led.get_object_color_material()
+    material.name = "Renamed"
+    assert helpers.led.get_object_color_material() == material
+    assert len(bpy.data.materials) == 2
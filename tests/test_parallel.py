@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("bpy")
+
+
+def test_workers_extract_led_materials(helpers, show, blender_binary):
+    """Workers register the add-on, so LED materials are extracted without falling back"""
+    scene, drones, _ = show
+
+    extractor = helpers.parallel.ParallelExtractor(scene, drones, workers=2, timeout=300)
+    while not extractor.done:
+        extractor.step()
+    serial = helpers.animation.extract_trajectory(scene, drones)
+
+    assert extractor.warnings == []
+    np.testing.assert_allclose(extractor.trajectory.positions, serial.positions, atol=1e-5)
+    np.testing.assert_allclose(extractor.trajectory.yaw, serial.yaw, atol=1e-5)
+    np.testing.assert_array_equal(extractor.trajectory.led, serial.led)
+    assert extractor.trajectory.led.any()
@@ -0,0 +1,94 @@
+import struct
+
+import numpy as np
+import pytest
+
+
+def random_show(frame_count: int, drone_count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return dict(
+        title="Шоу 1",
+        drones=[f"Drone {index}" for index in range(drone_count)],
+        frames=np.arange(5, 5 + frame_count, dtype=np.int32),
+        positions=rng.uniform(-100, 100, (frame_count, drone_count, 3)).astype(np.float32),
+        yaw=rng.uniform(-np.pi, np.pi, (frame_count, drone_count)),
+        led=rng.integers(0, 256, (frame_count, drone_count, 3), dtype=np.uint8),
+        fps=24.0,
+        coordinate_system="ENU",
+    )
+
+
+@pytest.mark.parametrize("frame_count, drone_count", [(50, 7), (1, 1), (0, 3), (0, 0)])
+def test_round_trip(standalone, tmp_path, frame_count, drone_count):
+    show_file = standalone.show_file
+    show = random_show(frame_count, drone_count)
+    filepath = tmp_path / f"show{show_file.FILE_EXTENSION}"
+
+    show_file.write_show_file(filepath, **show)
+    result = show_file.read_show_file(filepath)
+
+    assert result.version == show_file.VERSION
+    assert result.title == show["title"]
+    assert result.drones == show["drones"]
+    assert result.drone_count == drone_count
+    assert result.fps == show["fps"]
+    assert result.coordinate_system == show["coordinate_system"]
+    assert result.frame_count == frame_count
+    np.testing.assert_array_equal(result.frames, show["frames"])
+    assert filepath.stat().st_size % show_file.ALIGNMENT == 0
+
+    for index, name in enumerate(show["drones"]):
+        for drone in (index, name):
+            positions, yaw, led = result.track(drone)
+            np.testing.assert_array_equal(
+                positions, np.rint(show["positions"][:, index].astype(np.float64) * 1000) / 1000
+            )
+            np.testing.assert_array_equal(yaw, np.rint(show["yaw"][:, index] * 1000) / 1000)
+            np.testing.assert_array_equal(led, show["led"][:, index])
+
+
+def test_track_frames(standalone, tmp_path):
+    show_file = standalone.show_file
+    show = random_show(50, 3)
+    filepath = tmp_path / "show.dshow"
+    show_file.write_show_file(filepath, **show)
+    result = show_file.read_show_file(filepath)
+
+    positions, yaw, led = result.track("Drone 1", slice(10, 40, 3))
+    full_positions, full_yaw, full_led = result.track(1)
+    np.testing.assert_array_equal(positions, full_positions[10:40:3])
+    np.testing.assert_array_equal(yaw, full_yaw[10:40:3])
+    np.testing.assert_array_equal(led, full_led[10:40:3])
+    # Tracks are copies, not views of the memory-mapped file
+    assert led.flags.writeable and not np.shares_memory(led, result.led)
+
+
+def test_not_a_show_file(standalone, tmp_path):
+    show_file = standalone.show_file
+    for content in (b"", b"DRONESH", b"NOTSHOW!" + bytes(16)):
+        filepath = tmp_path / "show.dshow"
+        filepath.write_bytes(content)
+        with pytest.raises(show_file.ShowFileError):
+            show_file.read_show_file(filepath)
+
+
+def test_newer_version(standalone, tmp_path):
+    show_file = standalone.show_file
+    filepath = tmp_path / "show.dshow"
+    show_file.write_show_file(filepath, **random_show(5, 2))
+
+    with open(filepath, "r+b") as file:
+        file.seek(len(show_file.MAGIC))
+        file.write(struct.pack("<H", show_file.VERSION + 1))
+    with pytest.raises(show_file.ShowFileError, match="not supported"):
+        show_file.read_show_file(filepath)
+
+
+@pytest.mark.parametrize("value", [np.nan, 3e6])
+def test_values_out_of_range(standalone, tmp_path, value):
+    show_file = standalone.show_file
+    show = random_show(5, 2)
+    show["positions"][2, 1, 0] = value
+
+    with pytest.raises(show_file.ShowFileError):
+        show_file.write_show_file(tmp_path / "show.dshow", **show)